@@ -0,0 +1,225 @@
+# Quantity-aware global assignment of open requests to available food items,
+# used by crud.assign_requests_to_food_items
+from collections import defaultdict
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+from geo import location_of, distances_km, PointIndex
+from matching import keyword_text
+
+URGENCY_WEIGHT = {"high": 30.0, "medium": 20.0, "low": 10.0}
+NEEDED_BY_WEIGHT = 5.0  # extra priority for requests needed soon, decaying per day
+EXPIRY_WEIGHT = 3.0     # preference for items that expire soon, decaying per day
+TITLE_MATCH_WEIGHT = 1.0
+DESCRIPTION_MATCH_WEIGHT = 0.5
+# Groups with a location are offered their nearest items, up to this many times their demand
+CANDIDATE_SUPPLY_FACTOR = 4
+
+
+def _days_until(moments, now: datetime) -> np.ndarray:
+    """Days from now to each moment (None counts as far away), never negative"""
+    seconds = np.array([
+        (moment - now).total_seconds() if moment is not None else np.inf for moment in moments
+    ], dtype=float)
+    return np.maximum(seconds / 86400.0, 0.0)
+
+
+def request_priority(requests, now: datetime) -> np.ndarray:
+    """Per-unit value of serving each request: urgency plus how soon it is needed"""
+    urgency = np.array([URGENCY_WEIGHT.get(req.urgency, 0.0) for req in requests])
+    return urgency + NEEDED_BY_WEIGHT / (1.0 + _days_until([req.needed_by for req in requests], now))
+
+
+def item_preference(items, now: datetime) -> np.ndarray:
+    """Per-unit value of handing out each item: sooner expiry first"""
+    return EXPIRY_WEIGHT / (1.0 + _days_until([item.expiry for item in items], now))
+
+
+class _ItemLocations:
+    """Radius lookups over the items of one category.
+
+    Items without coordinates are reachable from everywhere. Lookups are cached
+    per location, since requests of one receiver share a location.
+    """
+
+    def __init__(self, items):
+        located, unlocated, points = [], [], []
+        for index, item in enumerate(items):
+            location = location_of(item)
+            if location is None:
+                unlocated.append(index)
+            else:
+                located.append(index)
+                points.append(location)
+        self._located = np.array(located, dtype=int)
+        self._unlocated = np.array(unlocated, dtype=int)
+        self._index = PointIndex(points)
+        self._points = np.full((len(items), 2), np.nan)
+        if points:
+            self._points[self._located] = points
+        self._near = {}
+
+    def near(self, location, radius_km: float) -> np.ndarray:
+        """Sorted indexes of the items within radius_km of location"""
+        key = (location, radius_km)
+        if key not in self._near:
+            near = self._located[np.array(self._index.within(location, radius_km), dtype=int)]
+            self._near[key] = np.sort(np.concatenate([near, self._unlocated]))
+        return self._near[key]
+
+    def distances(self, location, indexes) -> np.ndarray:
+        """Distances in km from location to the given items, inf for items without coordinates"""
+        return np.nan_to_num(distances_km(location, self._points[indexes]), nan=np.inf)
+
+
+def _solve_category(requests, items, now: datetime, radius_km: float = None):
+    """Solve one category as a min-cost flow and return (request, item, quantity) allocations.
+
+    Requests asking for the same keyword from the same place share one group node,
+    so the network is
+        request --(≤ remaining quantity)--> keyword group --> matching item --(≤ remaining quantity)-->
+    and has one edge per request plus one per (group, matching item), instead of
+    one per (request, item) pair. With radius_km, groups with coordinates only
+    reach their nearest items within the radius, which keeps the network small
+    when many receivers share a dense area. The constraint matrix is a network
+    matrix, so the simplex solution is integral.
+    """
+    groups = defaultdict(list)
+    for index, req in enumerate(requests):
+        location = location_of(req) if radius_km else None
+        groups[((req.requested_item or "").lower(), location)].append(index)
+
+    texts = [keyword_text(item.title, item.description) for item in items]
+    titles = [(item.title or "").lower() for item in items]
+    preference = item_preference(items, now)
+    item_capacity = np.array([item.quantity for item in items], dtype=float)
+    keyword_masks = {}
+    locations = None
+
+    edge_group, edge_item, edge_value = [], [], []
+    group_requests = []
+    for (keyword, location), request_indexes in groups.items():
+        mask = keyword_masks.get(keyword)
+        if mask is None:
+            mask = keyword_masks[keyword] = np.array([keyword in text for text in texts], dtype=bool)
+        if location is None:
+            matching = np.flatnonzero(mask)
+        else:
+            locations = locations or _ItemLocations(items)
+            near = locations.near(location, radius_km)
+            matching = near[mask[near]]
+        if not len(matching):
+            continue
+        in_title = np.array([keyword in titles[j] for j in matching])
+        value = preference[matching] + np.where(in_title, TITLE_MATCH_WEIGHT, DESCRIPTION_MATCH_WEIGHT)
+
+        if location is not None:
+            demand = sum(requests[i].quantity for i in request_indexes)
+            nearest = np.argsort(locations.distances(location, matching), kind="stable")
+            supply = np.cumsum(item_capacity[matching[nearest]])
+            nearest = np.sort(nearest[:np.searchsorted(supply, CANDIDATE_SUPPLY_FACTOR * demand) + 1])
+            matching, value = matching[nearest], value[nearest]
+
+        g = len(group_requests)
+        group_requests.append(request_indexes)
+        edge_group.append(np.full(len(matching), g))
+        edge_item.append(matching)
+        edge_value.append(value)
+
+    if not group_requests:
+        return []
+
+    edge_group = np.concatenate(edge_group)
+    edge_item = np.concatenate(edge_item)
+    edge_value = np.concatenate(edge_value)
+
+    request_index = np.concatenate([np.array(indexes) for indexes in group_requests])
+    request_group = np.concatenate([np.full(len(indexes), g) for g, indexes in enumerate(group_requests)])
+    request_value = request_priority([requests[i] for i in request_index], now)
+    request_capacity = np.array([requests[i].quantity for i in request_index], dtype=float)
+
+    n_requests, n_edges = len(request_index), len(edge_group)
+    # Variables: request flows first, then group -> item flows
+    conservation = sparse.coo_matrix((
+        np.concatenate([np.ones(n_requests), -np.ones(n_edges)]),
+        (np.concatenate([request_group, edge_group]),
+         np.concatenate([np.arange(n_requests), n_requests + np.arange(n_edges)]))
+    ), shape=(len(group_requests), n_requests + n_edges)).tocsr()
+    item_limits = sparse.coo_matrix(
+        (np.ones(n_edges), (edge_item, n_requests + np.arange(n_edges))),
+        shape=(len(items), n_requests + n_edges)
+    ).tocsr()
+
+    result = linprog(
+        -np.concatenate([request_value, edge_value]),
+        A_ub=item_limits, b_ub=item_capacity,
+        A_eq=conservation, b_eq=np.zeros(len(group_requests)),
+        bounds=np.column_stack([
+            np.zeros(n_requests + n_edges),
+            np.concatenate([request_capacity, np.full(n_edges, np.inf)])
+        ]),
+        method="highs-ds",
+    )
+    if result.status != 0:
+        raise RuntimeError(f"Assignment solver failed: {result.message}")
+
+    flow = np.rint(result.x).astype(int)
+    return _decompose(requests, items, request_index, request_group,
+                      request_value, flow[:n_requests], edge_group, edge_item, flow[n_requests:])
+
+
+def _decompose(requests, items, request_index, request_group, request_value,
+               request_flow, edge_group, edge_item, edge_flow):
+    """Split each group's flow into (request, item, quantity) allocations.
+
+    Every request of a group can take any of its items at the same value, so the
+    flows are paired off in priority order; an item may be split across several
+    requests and a request may be served by several items.
+    """
+    allocations = []
+    takers_by_group, givers_by_group = defaultdict(list), defaultdict(list)
+    for k in sorted(np.flatnonzero(request_flow > 0), key=lambda k: -request_value[k]):
+        takers_by_group[request_group[k]].append([request_flow[k], requests[request_index[k]]])
+    for e in np.flatnonzero(edge_flow > 0):
+        givers_by_group[edge_group[e]].append([edge_flow[e], items[edge_item[e]]])
+
+    for g, takers in takers_by_group.items():
+        t = 0
+        for give in givers_by_group[g]:
+            while give[0] > 0 and t < len(takers):
+                quantity = min(give[0], takers[t][0])
+                allocations.append((takers[t][1], give[1], int(quantity)))
+                give[0] -= quantity
+                takers[t][0] -= quantity
+                if takers[t][0] == 0:
+                    t += 1
+    return allocations
+
+
+def plan_allocations(requests, items, now: datetime = None, radius_km: float = None):
+    """Allocate item quantities to open requests, maximizing total weighted units served.
+
+    `requests` need id, category, quantity (still unallocated), urgency,
+    requested_item and needed_by; `items` need id, category, quantity (still
+    unallocated), title, description and expiry. Rows may carry latitude and
+    longitude; with radius_km, a request with coordinates is only served by items
+    within that distance. Categories are solved independently. Returns a list of
+    (request, item, quantity) triples.
+    """
+    now = now or datetime.utcnow()
+    requests_by_category = defaultdict(list)
+    for req in requests:
+        if req.quantity > 0:
+            requests_by_category[req.category].append(req)
+    items_by_category = defaultdict(list)
+    for item in items:
+        if item.quantity > 0:
+            items_by_category[item.category].append(item)
+
+    allocations = []
+    for category, category_requests in requests_by_category.items():
+        category_items = items_by_category.get(category)
+        if category_items:
+            allocations.extend(_solve_category(category_requests, category_items, now, radius_km))
+    return allocations
@@ -0,0 +1,151 @@
+# Async versions of the crud.py functions used on the request path (DB_ASYNC=true)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from models import FoodItemCreate, RequestCreate, FeedbackCreate
+from schema import User, FoodItem, Request, Feedback
+from crud import (
+    food_item_bulk_insert, active_inventory_select, inventory_window, inventory_row, receiver_requests_select, shelter_request_row,
+    requests_listing_select, request_listing_row, page_with_cursor
+)
+from rollups import record_donations
+from geocoding import food_item_coordinates
+from embeddings import store_item_embeddings
+from changes import provider_changed, receiver_changed, collection_version_select
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    """Get auth entry by email"""
+    return (await db.execute(select(User).where(User.email == email))).scalars().first()
+
+
+async def create_new_food_item(db: AsyncSession, food_item_data: FoodItemCreate, user_id: int):
+    """Create a new food item"""
+    [(latitude, longitude)] = await db.run_sync(
+        food_item_coordinates, [(user_id, food_item_data.pickup_location)]
+    )
+    food_item = FoodItem(
+        provider_id=user_id,
+        latitude=latitude,
+        longitude=longitude,
+        **food_item_data.dict()
+    )
+    db.add(food_item)
+    await db.flush()
+    await db.run_sync(record_donations, [food_item])
+    await db.run_sync(store_item_embeddings, [food_item])
+    provider_changed(db, user_id)
+    await db.commit()
+    await db.refresh(food_item)
+    return food_item
+
+
+async def create_food_items_bulk(db: AsyncSession, items, user_id: int):
+    """Insert many validated items in one transaction, returning their rows"""
+    if not items:
+        return []
+    coordinates = await db.run_sync(food_item_coordinates, [(user_id, item.pickup_location) for item in items])
+    created = (await db.execute(*food_item_bulk_insert(items, user_id, coordinates))).all()
+    await db.run_sync(record_donations, created)
+    await db.run_sync(store_item_embeddings, created)
+    provider_changed(db, user_id)
+    await db.commit()
+    return created
+
+
+async def create_request(db: AsyncSession, receiver_id: int, request_data: RequestCreate):
+    new_request = Request(
+        receiver_id=receiver_id,
+        title=request_data.title,
+        requested_item=request_data.requested_item,
+        category=request_data.category,
+        quantity=request_data.quantity,
+        urgency=request_data.urgency,
+        needed_by=request_data.needed_by,
+        is_recurring=request_data.is_recurring,
+        notes=request_data.notes,
+        status="open"
+    )
+    db.add(new_request)
+    receiver_changed(db, receiver_id)
+    await db.commit()
+    await db.refresh(new_request)
+    return new_request
+
+
+async def submit_feedback(db: AsyncSession, receiver_id: int, feedback_data: FeedbackCreate):
+    request = (await db.execute(
+        select(Request).where(Request.id == feedback_data.request_id)
+    )).scalars().first()
+
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    if request.receiver_id != receiver_id:
+        raise HTTPException(status_code=403, detail="You are not the owner of this request")
+
+    if request.status != "fulfilled":
+        raise HTTPException(status_code=400, detail="Feedback can only be submitted for fulfilled requests")
+
+    existing = await db.scalar(select(Feedback.id).where(Feedback.request_id == request.id))
+    if existing:
+        raise HTTPException(status_code=400, detail="Feedback already submitted for this request")
+
+    new_feedback = Feedback(
+        request_id=feedback_data.request_id,
+        rating=feedback_data.rating,
+        comments=feedback_data.comments
+    )
+    db.add(new_feedback)
+    await db.commit()
+    await db.refresh(new_feedback)
+    return new_feedback
+
+
+async def get_active_inventory(db: AsyncSession, provider_id: int, conditions=None, sort: str = "condition",
+                               after=None, limit: int = None):
+    stmt = active_inventory_select(provider_id, *inventory_window(), conditions, sort, after)
+    if limit is None:
+        return [inventory_row(item) for item in (await db.execute(stmt)).all()], None
+
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    rows, next_cursor = page_with_cursor(rows, limit, key=lambda row: (row.sort_key, row.id))
+    return [inventory_row(item) for item in rows], next_cursor
+
+
+async def iter_active_inventory(db: AsyncSession, provider_id: int, conditions=None, sort: str = "condition",
+                                after=None, batch_size: int = 1000):
+    """Stream a provider's active inventory rows through a server-side cursor"""
+    stmt = active_inventory_select(provider_id, *inventory_window(), conditions, sort, after)
+    async for item in await db.stream(stmt.execution_options(yield_per=batch_size)):
+        yield inventory_row(item)
+
+
+async def get_requests_for_receiver(db: AsyncSession, receiver_id: int):
+    requests = (await db.execute(receiver_requests_select(receiver_id))).scalars().all()
+    return [shelter_request_row(req) for req in requests]
+
+
+async def iter_requests_for_receiver(db: AsyncSession, receiver_id: int, batch_size: int = 1000):
+    """Stream a receiver's requests through a server-side cursor"""
+    stmt = receiver_requests_select(receiver_id).execution_options(yield_per=batch_size)
+    async for req in await db.stream_scalars(stmt):
+        yield shelter_request_row(req)
+
+
+async def get_requests_page(db: AsyncSession, statuses=None, after=None, limit: int = 100):
+    """One page of requests from all receivers, see crud.get_requests_page"""
+    rows = (await db.execute(requests_listing_select(statuses, after).limit(limit + 1))).all()
+    rows, next_cursor = page_with_cursor(rows, limit)
+    return [request_listing_row(req) for req in rows], next_cursor
+
+
+async def iter_requests(db: AsyncSession, statuses=None, after=None, batch_size: int = 1000):
+    """Stream every request matching the filters through a server-side cursor"""
+    stmt = requests_listing_select(statuses, after).execution_options(yield_per=batch_size)
+    async for req in await db.stream(stmt):
+        yield request_listing_row(req)
+
+
+async def collection_version(db: AsyncSession, scope: str, owner_id: int = 0) -> int:
+    return (await db.execute(collection_version_select(scope, owner_id))).scalar() or 0
@@ -0,0 +1,208 @@
+# Async variants of the I/O-bound endpoints, mounted ahead of routes.py when DB_ASYNC is enabled
+
+import time
+from datetime import datetime
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Body, Depends, Header, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.logging_config import get_logger
+from config.database import get_async_db
+from config.replicas import get_async_read_db, read_session_factory
+from models import FoodItemCreate, FoodItemOut, RequestOut, RequestCreate, FeedbackOut, FeedbackCreate, ShelterRequestOut, Principal, InventoryCondition, InventorySort
+import async_crud
+from crud import INVENTORY_SORT_TYPES, validate_food_item_batch, match_requests_to_food_items
+from config.settings import settings
+from scheduler import match_new_rows
+from auth import get_current_user
+from pagination import decode_cursor_param
+from streaming import async_ndjson_response
+from response_cache import async_cached_provider_response
+from changes import PROVIDER_ITEMS, RECEIVER_REQUESTS, ALL_REQUESTS
+from etags import listing_etag, conditional_response
+from serializers import json_response, food_item_out, request_out
+
+async_app_router = APIRouter()
+logger = get_logger(__name__)
+
+
+################## FOOD ITEM ENDPOINT #######################
+
+@async_app_router.post("/add-food", response_model=FoodItemOut)
+async def create_food_item(
+    food_data: FoodItemCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    try:
+        if current_user.role != "provider":
+            raise HTTPException(status_code=403, detail="Only providers can post food items")
+
+        food_item = await async_crud.create_new_food_item(db, food_data, current_user.id)
+        if settings.MATCH_ON_CREATE:
+            background_tasks.add_task(match_new_rows, item_ids=[food_item.id])
+        return json_response(food_item_out.row(food_item))
+    except HTTPException as http_exc:
+        logger.error(f"HTTPException: {http_exc.detail}")
+        raise http_exc
+    except Exception as exc:
+        logger.error(f"An unexpected error occurred: {exc}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred")
+
+
+@async_app_router.post("/add-food/bulk")
+async def create_food_items_in_bulk(
+    background_tasks: BackgroundTasks,
+    payload: List[Any] = Body(..., description="FoodItemCreate objects"),
+    match: bool = Query(False, description="Run matching for the new items before responding"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Post many food items at once, see routes.create_food_items_in_bulk."""
+    if current_user.role != "provider":
+        raise HTTPException(status_code=403, detail="Only providers can post food items")
+    if len(payload) > settings.BULK_FOOD_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BULK_FOOD_MAX_ITEMS} items per batch")
+
+    valid, errors = validate_food_item_batch(payload)
+    created = await async_crud.create_food_items_bulk(db, [item for _, item in valid], current_user.id)
+    result = {
+        "created": [{"index": index, **food_item_out.row(row)} for (index, _), row in zip(valid, created)],
+        "errors": errors
+    }
+    if match and created:
+        result["matches"] = await db.run_sync(
+            match_requests_to_food_items, item_ids=[row.id for row in created]
+        )
+    elif created and settings.MATCH_ON_CREATE:
+        background_tasks.add_task(match_new_rows, item_ids=[row.id for row in created])
+    return json_response(result)
+
+
+############## REQUEST ENDPOINTS #######################
+@async_app_router.post("/requests", response_model=RequestOut)
+async def submit_food_request(
+    request_data: RequestCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role != "receiver":
+        raise HTTPException(status_code=403, detail="Only receivers can submit requests")
+
+    new_request = await async_crud.create_request(db, current_user.id, request_data)
+    if settings.MATCH_ON_CREATE:
+        background_tasks.add_task(match_new_rows, request_ids=[new_request.id])
+    return json_response(request_out.row(new_request))
+
+
+@async_app_router.get("/all-requests")
+async def get_all_open_requests(
+    response: Response,
+    status_filter: Optional[List[str]] = Query(None, alias="status", description="Only return requests with these statuses"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get requests from all receivers, see routes.get_all_open_requests."""
+    if current_user.role != "provider":
+        raise HTTPException(status_code=403, detail="Only providers can view available requests")
+
+    after = decode_cursor_param(cursor, datetime, int)
+    statuses = [s.lower() for s in status_filter] if status_filter else None
+    if response_format == "ndjson":
+        return async_ndjson_response(read_session_factory(db), async_crud.iter_requests, statuses, after)
+
+    version = await async_crud.collection_version(db, ALL_REQUESTS)
+    etag = listing_etag(version, "all-requests", statuses, cursor, limit)
+    not_modified = conditional_response(response, if_none_match, etag)
+    if not_modified:
+        return not_modified
+
+    result, next_cursor = await async_crud.get_requests_page(db, statuses, after, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return json_response(result, response)
+
+
+############### PROVIDER ENDPOINTS #######################
+@async_app_router.get("/inventory/active")
+async def load_active_inventory(
+    response: Response,
+    condition: Optional[List[InventoryCondition]] = Query(None, description="Only return items in these conditions"),
+    sort: InventorySort = Query("condition", description="condition sorts the most urgent items first"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size, every item when absent"),
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    user=Depends(get_current_user)
+):
+    if user.role != "provider":
+        return {"message": "Only providers have an active inventory."}
+
+    conditions = tuple(sorted(set(condition))) if condition else None
+    after = decode_cursor_param(cursor, INVENTORY_SORT_TYPES[sort], int)
+    if response_format == "ndjson":
+        return async_ndjson_response(
+            read_session_factory(db), async_crud.iter_active_inventory, user.id, conditions, sort, after
+        )
+
+    version = await async_crud.collection_version(db, PROVIDER_ITEMS, user.id)
+    etag = listing_etag(version, "inventory", user.id, conditions, sort, cursor, limit, int(time.time() // 60))
+    not_modified = conditional_response(response, if_none_match, etag)
+    if not_modified:
+        return not_modified
+
+    async def build():
+        inventory, next_cursor = await async_crud.get_active_inventory(
+            db, user.id, conditions, sort, after, limit
+        )
+        return {"inventory": inventory}, next_cursor
+
+    body, next_cursor = await async_cached_provider_response(
+        user.id, ("inventory", version, conditions, sort, after, limit), build
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(body, response)
+
+
+####################### FEEDBACK ENDPOINTS #######################
+@async_app_router.post("/feedback", response_model=FeedbackOut)
+async def leave_feedback(
+    feedback_data: FeedbackCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role != "receiver":
+        raise HTTPException(status_code=403, detail="Only receivers can leave feedback")
+
+    return await async_crud.submit_feedback(db, current_user.id, feedback_data)
+
+
+@async_app_router.get("/receiver/requests", response_model=List[ShelterRequestOut])
+async def get_receiver_requests(
+    response: Response,
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    if current_user.role != "receiver":
+        raise HTTPException(status_code=403, detail="Only receivers can view their requests")
+
+    if response_format == "ndjson":
+        return async_ndjson_response(read_session_factory(db), async_crud.iter_requests_for_receiver, current_user.id)
+
+    version = await async_crud.collection_version(db, RECEIVER_REQUESTS, current_user.id)
+    etag = listing_etag(version, "receiver-requests", current_user.id)
+    not_modified = conditional_response(response, if_none_match, etag)
+    if not_modified:
+        return not_modified
+
+    return json_response(await async_crud.get_requests_for_receiver(db, current_user.id), response)
@@ -1,31 +1,54 @@
+import time
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Cookie
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from config.database import get_db
+from config.database import get_db, AsyncSessionLocal
 from crud import get_user_by_email
+import async_crud
 from config.settings import settings
 from schema import User
-from models import TokenData
+from models import TokenData, Principal
 from config.logging_config import get_logger
+from cache import TTLCache
+from cache_bus import bind_cache, invalidate
+from passwords import verify_password, get_password_hash, hashing_pool
 
 logger = get_logger(__name__)
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Helper functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# Decoded token -> Principal, so authenticated calls skip the user lookup
+principal_cache = TTLCache(
+    "principals",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+def _user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def invalidate_principal(user_id: int) -> None:
+    """Forget every cached token of a user, in this process only"""
+    principal_cache.invalidate_tag(_user_tag(user_id))
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# Changed users are dropped in every worker once the change commits
+bind_cache(principal_cache, "user", lambda event: [_user_tag(event["id"])])
 
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        invalidate_principal(target.id)
+    else:
+        invalidate(session, "user", target.id, target.id)
+
+# Helper functions
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -36,7 +59,7 @@ def create_access_token(data: dict):
 async def get_current_user(
     access_token: Optional[str] = Cookie(None, alias="access_token"),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -45,11 +68,15 @@ async def get_current_user(
     
     if not access_token:
         raise credentials_exception
-        
+
+    # Remove "Bearer " prefix if it exists
+    token = access_token.replace("Bearer ", "") if access_token.startswith("Bearer ") else access_token
+
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     try:
-        # Remove "Bearer " prefix if it exists
-        token = access_token.replace("Bearer ", "") if access_token.startswith("Bearer ") else access_token
-        
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
@@ -59,20 +86,31 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
         
-    user = get_user_by_email(db, token_data.email)
+    if settings.DB_ASYNC:
+        async with AsyncSessionLocal() as async_db:
+            user = await async_crud.get_user_by_email(async_db, token_data.email)
+    else:
+        user = await run_in_threadpool(get_user_by_email, db, token_data.email)
     if user is None:
         raise credentials_exception
-        
-    return user
 
-def authenticate_user(db: Session, email: str, password: str):
+    principal = Principal(
+        id=user.id, email=user.email, role=user.role, location=user.location, expires_at=payload.get("exp")
+    )
+    # Never serve a token from the cache past its own expiry
+    expires_in = principal.expires_at - time.time() if principal.expires_at is not None else None
+    principal_cache.set(token, principal, ttl=expires_in, tags=(_user_tag(user.id),))
+
+    return principal
+
+async def authenticate_user(db: Session, email: str, password: str):
     """Authenticate user using the new Auth table"""
     logger.info(f"Attempting to authenticate user with email: {email}")
-    auth_info = get_user_by_email(db, email)
+    auth_info = await run_in_threadpool(get_user_by_email, db, email)
     if not auth_info:
         logger.warning(f"Authentication failed: User with email {email} not found")
         return False
-    if not verify_password(password, auth_info.password_hash):
+    if not await hashing_pool.verify(password, auth_info.password_hash):
         logger.warning(f"Authentication failed: Incorrect password for email {email}")
         return False
     logger.info(f"User with email {email} authenticated successfully")
@@ -0,0 +1,116 @@
+# In-process caches shared by the backend
+import threading
+import time
+from collections import OrderedDict
+
+_registry = {}
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a time-to-live.
+
+    Entries can carry tags (for example "user:42") so every key derived from
+    the same record can be dropped with one invalidate_tag call. Every
+    invalidate_tag also bumps the tag's version, and clear() the version of the
+    whole cache, so a value computed while its tags were being invalidated can
+    be refused by set(..., versions=...).
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, tags)
+        self._tags = {}  # tag -> set of keys
+        self._versions = {}  # tag -> number of invalidations
+        self._generation = 0  # number of clear() calls
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _registry[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def tag_versions(self, tags) -> tuple:
+        """Current versions of tags, to pass back to set() once the value is built"""
+        with self._lock:
+            return (*(self._versions.get(tag, 0) for tag in tags), self._generation)
+
+    def set(self, key, value, ttl: float = None, tags=(), versions: tuple = None):
+        """Store value for ttl seconds (the cache default when None).
+
+        With versions (from tag_versions), the value is dropped when any of its
+        tags was invalidated in the meantime.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if versions is not None and versions != (*(self._versions.get(tag, 0) for tag in tags), self._generation):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters of every cache in this process"""
+    return {name: cache.stats() for name, cache in _registry.items()}
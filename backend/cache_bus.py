@@ -0,0 +1,51 @@
+# Invalidation bus for the in-process caches of every worker process. Writers
+# publish what they changed (entity type, id, owner id) in their transaction;
+# after the commit each process evicts the matching cache entries, and caches
+# are flushed whole when the listener reconnected and may have missed some.
+import pubsub
+from cache import TTLCache
+
+CHANNEL = "cache_invalidation"
+
+_handlers = {}
+_caches = []
+
+
+def invalidate(db, entity: str, entity_id: int = None, owner_id: int = None):
+    """Publish that db's transaction changed an entity; entity_id None means any of owner_id's"""
+    pubsub.publish(db, CHANNEL, {"entity": entity, "id": entity_id, "owner_id": owner_id})
+
+
+def on_invalidate(entity: str):
+    """Register handler(events) for changes of entity; events are dicts with id and owner_id"""
+    def register(handler):
+        _handlers.setdefault(entity, []).append(handler)
+        return handler
+    return register
+
+
+def bind_cache(cache: TTLCache, entity: str, tags):
+    """Evict the entries of cache tagged tags(event) whenever entity changes, in any process"""
+    @on_invalidate(entity)
+    def evict(events):
+        for tag in {tag for event in events for tag in tags(event)}:
+            cache.invalidate_tag(tag)
+
+    if cache not in _caches:
+        _caches.append(cache)
+
+
+@pubsub.subscribe(CHANNEL)
+def _dispatch(events):
+    by_entity = {}
+    for event in events:
+        by_entity.setdefault(event["entity"], []).append(event)
+    for entity, entity_events in by_entity.items():
+        for handler in _handlers.get(entity, ()):
+            handler(entity_events)
+
+
+@pubsub.on_reconnect
+def _flush_caches():
+    for cache in _caches:
+        cache.clear()
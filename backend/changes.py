@@ -0,0 +1,66 @@
+# Tracks the listings a transaction changed: their version counters are bumped
+# just before it commits, and the caches of every worker are told through cache_bus
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from cache_bus import invalidate
+from config.database import dialect_insert
+from schema import CollectionVersion
+
+PROVIDER_ITEMS = "provider_items"        # one provider's food items, owner_id = provider id
+RECEIVER_REQUESTS = "receiver_requests"  # one receiver's requests, owner_id = receiver id
+ALL_REQUESTS = "all_requests"            # every receiver's requests, owner_id = 0
+
+_CHANGED = "changed_collections"
+
+
+def _collections_changed(db, scope: str, owner_ids):
+    db.info.setdefault(_CHANGED, set()).update((scope, owner_id) for owner_id in owner_ids)
+
+
+def provider_changed(db, *provider_ids):
+    """Record that the current transaction changed these providers' items or matches"""
+    _collections_changed(db, PROVIDER_ITEMS, provider_ids)
+    for provider_id in provider_ids:
+        invalidate(db, "food_item", owner_id=provider_id)
+
+
+def receiver_changed(db, *receiver_ids):
+    """Record that the current transaction changed these receivers' requests"""
+    _collections_changed(db, RECEIVER_REQUESTS, receiver_ids)
+    if receiver_ids:
+        _collections_changed(db, ALL_REQUESTS, (0,))
+    for receiver_id in receiver_ids:
+        invalidate(db, "request", owner_id=receiver_id)
+
+
+def collection_version_select(scope: str, owner_id: int = 0):
+    return select(CollectionVersion.version).where(
+        CollectionVersion.scope == scope, CollectionVersion.owner_id == owner_id
+    )
+
+
+def collection_version(db: Session, scope: str, owner_id: int = 0) -> int:
+    """Current change counter of a listing, 0 when it never changed"""
+    return db.execute(collection_version_select(scope, owner_id)).scalar() or 0
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session):
+    changed = session.info.get(_CHANGED)
+    if not changed:
+        return
+    table = CollectionVersion.__table__
+    insert = dialect_insert(session)
+    # Sorted so concurrent commits lock the counter rows in the same order
+    stmt = insert(table).values(
+        [{"scope": scope, "owner_id": owner_id, "version": 1} for scope, owner_id in sorted(changed)]
+    )
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["scope", "owner_id"], set_={"version": table.c.version + 1}
+    ))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session):
+    session.info.pop(_CHANGED, None)
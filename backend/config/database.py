@@ -1,7 +1,9 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from config.settings import settings
+from config.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, pool_stats
 
 # Database Dependency
 def get_db():
@@ -11,6 +13,45 @@ def get_db():
     finally:
         db.close()
 
-engine = create_engine(settings.DATABASE_URL)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def pool_options() -> dict:
+    """create_engine pool arguments from settings"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options())
 SessionLocal = sessionmaker(bind=engine)
+
+# Async engine, only created when DB_ASYNC is enabled
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **pool_options()
+    )
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+def dialect_insert(db):
+    """insert() with ON CONFLICT support for the database the session talks to"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+def engine_pool_stats() -> dict:
+    """Pool metrics of every engine in this process"""
+    stats = {"primary": pool_stats(engine)}
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.sync_engine)
+    return stats
+
 Base = declarative_base() 
\ No newline at end of file
@@ -0,0 +1,157 @@
+# Read replicas for the read-only endpoints (DB_REPLICA_URLS).
+# A client that has just written reads from the primary for
+# DB_READ_YOUR_WRITES_SECONDS, through a short-lived cookie set on its write
+# responses, and replicas more than DB_REPLICA_MAX_LAG_SECONDS behind are
+# skipped until they catch up.
+import itertools
+import threading
+import time
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from config.database import SessionLocal, AsyncSessionLocal, pool_options
+from config.logging_config import get_logger
+from config.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, pool_stats
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+STICKY_COOKIE = "read_primary"
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+_SESSION_FACTORY = "session_factory"
+
+# 0 on a caught-up standby (or on a database that is not one); replay time
+# alone keeps growing on an idle primary even when nothing is left to replay
+_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class Replica:
+    """Engines for one replica and its replication lag, re-measured every DB_REPLICA_LAG_CHECK_SECONDS"""
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url, poolclass=InstrumentedQueuePool, **pool_options())
+        self.sessions = sessionmaker(bind=self.engine)
+        self.async_sessions = None
+        if settings.DB_ASYNC:
+            async_engine = create_async_engine(
+                url.replace("postgresql+psycopg://", "postgresql+asyncpg://", 1),
+                poolclass=InstrumentedAsyncQueuePool, **pool_options()
+            )
+            self.async_sessions = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+        self.lag = 0.0
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def lag_is_stale(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= settings.DB_REPLICA_LAG_CHECK_SECONDS
+
+    def check_lag(self):
+        """Measure the replication lag in seconds; an unreachable replica counts as infinitely behind"""
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is measuring it
+        try:
+            if self.engine.dialect.name == "postgresql":
+                with self.engine.connect() as conn:
+                    lag = conn.execute(_LAG_QUERY).scalar()
+                self.lag = float("inf") if lag is None else float(lag)
+            else:
+                self.lag = 0.0
+        except Exception as exc:
+            logger.warning(f"Replica {self.engine.url.render_as_string(hide_password=True)} is unavailable: {exc}")
+            self.lag = float("inf")
+        finally:
+            self._checked_at = time.monotonic()
+            self._lock.release()
+
+    @property
+    def fresh(self) -> bool:
+        return self.lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+
+
+replicas = [Replica(url) for url in settings.REPLICA_URLS]
+_turn = itertools.count()
+
+
+def _check_stale_replicas():
+    for replica in replicas:
+        if replica.lag_is_stale():
+            replica.check_lag()
+
+
+def _pick_replica(request: Request):
+    """The next fresh replica in turn, None when the request must read from the primary"""
+    if not replicas or STICKY_COOKIE in request.cookies:
+        return None
+    start = next(_turn)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        if replica.fresh:
+            return replica
+    return None
+
+
+def get_read_db(request: Request):
+    """get_db for read-only endpoints: a session on a fresh replica when there is one, else on the primary"""
+    _check_stale_replicas()
+    replica = _pick_replica(request)
+    factory = replica.sessions if replica else SessionLocal
+    db = factory()
+    db.info[_SESSION_FACTORY] = factory
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """get_read_db for the async endpoints"""
+    if any(replica.lag_is_stale() for replica in replicas):
+        await run_in_threadpool(_check_stale_replicas)
+    replica = _pick_replica(request)
+    factory = replica.async_sessions if replica else AsyncSessionLocal
+    async with factory() as db:
+        db.info[_SESSION_FACTORY] = factory
+        yield db
+
+
+def read_session_factory(db):
+    """Session factory for the database a read session is on, for work that outlives the request"""
+    return db.info[_SESSION_FACTORY]
+
+
+class ReadYourWritesMiddleware:
+    """Sets the sticky cookie on successful writes, so the client's next reads see them"""
+
+    def __init__(self, app):
+        self.app = app
+        self._cookie = (
+            f"{STICKY_COOKIE}=1; Max-Age={settings.DB_READ_YOUR_WRITES_SECONDS}; Path=/; "
+            f"HttpOnly; Secure; SameSite=lax"
+        ).encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in _SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", self._cookie)]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def replica_stats() -> dict:
+    """Pool metrics and last measured lag of every replica"""
+    return {
+        f"replica{index}": {**pool_stats(replica.engine), "lag_seconds": replica.lag}
+        for index, replica in enumerate(replicas)
+    }
@@ -19,12 +19,86 @@ class Settings(BaseSettings):
     @property
     def DATABASE_URL(self) -> str:
         encoded_password = quote_plus(self.DB_PASSWORD)
-        return f"postgresql://{self.DB_USER}:{encoded_password}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+        return f"postgresql+psycopg://{self.DB_USER}:{encoded_password}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
+    # Connection pool, per engine and per worker process: keep
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under Postgres max_connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Serve the I/O-bound endpoints from an asyncpg engine and AsyncSession
+    DB_ASYNC: bool = False
+
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return self.DATABASE_URL.replace("postgresql+psycopg://", "postgresql+asyncpg://", 1)
+
+    # Read replicas for the read-only endpoints, comma-separated URLs, none when empty.
+    # Replicas more than DB_REPLICA_MAX_LAG_SECONDS behind (measured every
+    # DB_REPLICA_LAG_CHECK_SECONDS) are skipped, and a client reads from the primary
+    # for DB_READ_YOUR_WRITES_SECONDS after each write; keep that above the max lag
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 2.0
+    DB_READ_YOUR_WRITES_SECONDS: int = 10
+
+    @property
+    def REPLICA_URLS(self) -> list:
+        return [
+            url.strip().replace("postgresql://", "postgresql+psycopg://", 1)
+            for url in self.DB_REPLICA_URLS.split(",") if url.strip()
+        ]
 
     # Authentication
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 300
+    PASSWORD_HASH_CONCURRENCY: int = os.cpu_count() or 1
+
+    # Largest batch accepted by /add-food/bulk
+    BULK_FOOD_MAX_ITEMS: int = 1000
+    # Rows validated, COPYed and committed together by a CSV import
+    IMPORT_CHUNK_ROWS: int = 5000
+
+    # Match each new food item or request in the background once it is created
+    MATCH_ON_CREATE: bool = True
+
+    # Matching only pairs receivers with items this close (km), 0 ignores distance.
+    # Users and items without coordinates are matched regardless of distance.
+    MATCH_RADIUS_KM: float = 25.0
+    # Worker processes started by `python matcher.py`, each matching its own share of the open requests
+    MATCH_WORKERS: int = os.cpu_count() or 1
+
+    # Semantic matching (/match-ai): "hashing" for the built-in hashed character
+    # n-gram vectorizer, or "sentence-transformers:<model>" when that package is installed
+    EMBEDDING_MODEL: str = "hashing"
+    EMBEDDING_DIM: int = 512
+    SEMANTIC_MATCH_THRESHOLD: float = 0.3
+
+    # Per-provider dashboard responses (/inventory/active, /analytics/provider-impact)
+    PROVIDER_CACHE_SIZE: int = 2000
+    PROVIDER_CACHE_TTL_SECONDS: int = 60
+
+    # /events streams: messages queued per stream before it is told to resync,
+    # the idle heartbeat, and the reconnect delay suggested to clients
+    EVENT_STREAM_QUEUE_SIZE: int = 100
+    EVENT_STREAM_HEARTBEAT_SECONDS: int = 25
+    EVENT_STREAM_RETRY_MS: int = 5000
+
+    # How often each worker checks its LISTEN connection (cache invalidations, /events)
+    PUBSUB_PING_SECONDS: int = 15
+
+    # Background jobs, 0 disables a job
+    EXPIRY_SWEEP_INTERVAL_SECONDS: int = 300
+    EXPIRY_SWEEP_CHUNK_SIZE: int = 5000
+
+    # Internal endpoints
+    INTERNAL_METRICS_ENABLED: bool = False
 
     class Config:
         case_sensitive = True
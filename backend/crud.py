@@ -1,22 +1,43 @@
 # For all the database CRUD operations
+from collections import Counter
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_, case
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import select, insert, or_, case, update, tuple_, func, any_, cast, Integer, String
+from pydantic import ValidationError
 from fastapi import HTTPException
 from models import UserCreate, FoodItemCreate, RequestCreate, FeedbackCreate
-from schema import User, FoodItem, Request, Feedback
-# from sentence_transformers import SentenceTransformer, util
-
-#model = SentenceTransformer('all-MiniLM-L6-v2')
+from schema import User, FoodItem, Request, Feedback, Allocation
+from matching import plan_matches
+from assignment import plan_allocations
+from rollups import record_donations, record_status_changes, record_fulfilled_allocations
+from changes import provider_changed, receiver_changed
+from notifications import notify_status
+from search import food_item_keyword_filter, food_item_relevance
+from pagination import encode_cursor
+from geo import bounding_box, distance_km
+from geocoding import geocode, food_item_coordinates
+from embeddings import item_index, store_item_embeddings, plan_semantic_matches
+from serializers import shelter_request_out, request_listing_out
+from config.settings import settings
+
+# String column limits of food_items that FoodItemCreate does not enforce itself
+FOOD_ITEM_STRING_LENGTHS = {
+    column.name: column.type.length for column in FoodItem.__table__.c
+    if isinstance(column.type, String) and column.type.length and column.name in FoodItemCreate.model_fields
+}
 
 def create_user(db: Session, user_data: UserCreate, hashed_password: str):
     """Create a new user with auth info"""
 
+    latitude, longitude = geocode(db, user_data.location) or (None, None)
     user = User(
         email=user_data.email,
         name=user_data.name,
         password_hash=hashed_password,
         location=user_data.location,
+        latitude=latitude,
+        longitude=longitude,
         type=user_data.type,
         contact_info=user_data.contact_info,
         role=user_data.role,
@@ -34,16 +55,77 @@ def get_user_by_email(db: Session, email: str):
 
 def create_new_food_item(db: Session, food_item_data: FoodItemCreate, user_id: int):
     """Create a new food item"""
+    [(latitude, longitude)] = food_item_coordinates(db, [(user_id, food_item_data.pickup_location)])
     food_item = FoodItem(
         provider_id=user_id,
+        latitude=latitude,
+        longitude=longitude,
         **food_item_data.dict()
     )
     db.add(food_item)
+    db.flush()
+    record_donations(db, [food_item])
+    store_item_embeddings(db, [food_item])
+    provider_changed(db, user_id)
     db.commit()
     db.refresh(food_item)
     return food_item
 
-def get_available_food_items(db: Session, time: datetime, preferences: str):
+def validate_food_item_batch(payload: list):
+    """Validate raw bulk rows one at a time so a bad row does not sink the batch.
+
+    Besides the FoodItemCreate rules, strings are checked against the column
+    lengths so no row can fail inside the INSERT. Returns ([(index, item)], errors)
+    where each error is {"index": ..., "errors": [pydantic-style error dicts]}.
+    """
+    valid, errors = [], []
+    for index, raw in enumerate(payload):
+        try:
+            item = FoodItemCreate.model_validate(raw)
+        except ValidationError as exc:
+            errors.append({
+                "index": index,
+                "errors": exc.errors(include_url=False, include_context=False, include_input=False)
+            })
+            continue
+
+        too_long = [
+            {"type": "string_too_long", "loc": [name], "msg": f"String should have at most {length} characters"}
+            for name, length in FOOD_ITEM_STRING_LENGTHS.items()
+            if len(getattr(item, name, None) or "") > length
+        ]
+        if too_long:
+            errors.append({"index": index, "errors": too_long})
+        else:
+            valid.append((index, item))
+    return valid, errors
+
+
+def food_item_bulk_insert(items, user_id: int, coordinates):
+    """Multi-row INSERT ... RETURNING of validated items, rows come back in input order"""
+    stmt = insert(FoodItem).returning(*FoodItem.__table__.c, sort_by_parameter_order=True)
+    params = [
+        {"provider_id": user_id, "status": "available", "latitude": latitude, "longitude": longitude,
+         **item.model_dump()}
+        for item, (latitude, longitude) in zip(items, coordinates)
+    ]
+    return stmt, params
+
+
+def create_food_items_bulk(db: Session, items, user_id: int):
+    """Insert many validated items in one transaction, returning their rows"""
+    if not items:
+        return []
+    coordinates = food_item_coordinates(db, [(user_id, item.pickup_location) for item in items])
+    created = db.execute(*food_item_bulk_insert(items, user_id, coordinates)).all()
+    record_donations(db, created)
+    store_item_embeddings(db, created)
+    provider_changed(db, user_id)
+    db.commit()
+    return created
+
+
+def get_available_food_items(db: Session, time: datetime, preferences: dict = None):
     """Get available food items based on time and preferences"""
     query = db.query(FoodItem).filter(
         FoodItem.status == "available",
@@ -55,10 +137,38 @@ def get_available_food_items(db: Session, time: datetime, preferences: str):
     if preferences:
         preferred_keywords = preferences.get("cuisine")
         if preferred_keywords:
-            query = query.filter(FoodItem.description.ilike(f"%{preferred_keywords}%"))
+            query = query.filter(food_item_keyword_filter(preferred_keywords))
+            return query.order_by(
+                food_item_relevance(db, preferred_keywords).desc(), FoodItem.expiry.asc()
+            ).all()
 
-    query.order_by(FoodItem.expiry.asc()).all()
-    return query
+    return query.order_by(FoodItem.expiry.asc()).all()
+
+
+def get_nearby_available_food(db: Session, center, radius_km: float, category: str = None, limit: int = 100):
+    """Available, unexpired food items within radius_km of center, nearest first.
+
+    The bounding box of the circle is a range scan on ix_food_items_available_location,
+    so only items in the box are read; the exact distance is checked in Python.
+    Returns (item, distance_km) pairs.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(center, radius_km)
+    query = db.query(FoodItem).filter(
+        FoodItem.status == "available",
+        FoodItem.latitude.between(min_lat, max_lat),
+        FoodItem.longitude.between(min_lon, max_lon),
+        FoodItem.expiry > datetime.utcnow()
+    )
+    if category:
+        query = query.filter(FoodItem.category == category)
+
+    nearby = []
+    for item in query:
+        distance = distance_km(center, (item.latitude, item.longitude))
+        if distance <= radius_km:
+            nearby.append((item, distance))
+    nearby.sort(key=lambda pair: (pair[1], pair[0].expiry, pair[0].id))
+    return nearby[:limit]
 
 
 def create_request(db: Session, receiver_id: int, request_data: RequestCreate):
@@ -75,80 +185,530 @@ def create_request(db: Session, receiver_id: int, request_data: RequestCreate):
         status="open"
     )
     db.add(new_request)
+    receiver_changed(db, receiver_id)
     db.commit()
     db.refresh(new_request)
     return new_request
 
 
-def match_requests_to_food_items(db: Session):
-    matches = []
-    urgency_order = case(
+def _chunks(values, size=1000):
+    """Split a list into slices small enough for an IN (...) clause"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# Order in which open requests get first pick of the available items
+REQUEST_PRIORITY = (
+    case(
         (Request.urgency == "high", 1),
         (Request.urgency == "medium", 2),
         (Request.urgency == "low", 3),
         else_=4
+    ),
+    Request.created_at,
+    Request.id,
+)
+
+
+# Times a matcher re-plans the requests whose items a concurrent matcher claimed first
+MATCH_CLAIM_ROUNDS = 3
+
+
+def open_requests_select():
+    """Open requests with the quantity still unallocated as `quantity` and their receiver's coordinates"""
+    allocated = select(Allocation.request_id, func.sum(Allocation.quantity).label("allocated"))\
+        .join(Request, Request.id == Allocation.request_id)\
+        .where(Request.status == "open")\
+        .group_by(Allocation.request_id).subquery()
+    return select(
+        Request.id, Request.receiver_id, Request.category,
+        (Request.quantity - func.coalesce(allocated.c.allocated, 0)).label("quantity"),
+        Request.urgency, Request.requested_item, Request.needed_by,
+        # Primary key lookups per open request rather than a join that may read all of users
+        select(User.latitude).where(User.id == Request.receiver_id).scalar_subquery().label("latitude"),
+        select(User.longitude).where(User.id == Request.receiver_id).scalar_subquery().label("longitude")
+    ).outerjoin(allocated, allocated.c.request_id == Request.id).where(Request.status == "open")
+
+
+def _serves_any_of(item_ids):
+    """Condition for requests one of the items could serve: same category, keyword in its text.
+
+    Mirrors the substring test of matching.CandidateIndex, so new items load
+    the requests they may be paired with rather than their whole categories.
+    """
+    # What contains(autoescape=True) does to a literal, for a keyword that is a column
+    keyword = func.lower(Request.requested_item)
+    for character in ("/", "%", "_"):
+        keyword = func.replace(keyword, character, "/" + character)
+    pattern = "%" + keyword + "%"
+    return select(FoodItem.id).where(
+        FoodItem.id.in_(item_ids),
+        FoodItem.category == Request.category,
+        or_(
+            func.lower(FoodItem.title).like(pattern, escape="/"),
+            func.lower(FoodItem.description).like(pattern, escape="/"),
+        ),
+    ).exists()
+
+
+def available_items_select():
+    """Available food items with the quantity still unallocated as `quantity`"""
+    allocated = select(Allocation.food_item_id, func.sum(Allocation.quantity).label("allocated"))\
+        .join(FoodItem, FoodItem.id == Allocation.food_item_id)\
+        .where(FoodItem.status == "available")\
+        .group_by(Allocation.food_item_id).subquery()
+    return select(
+        FoodItem.id, FoodItem.provider_id, FoodItem.category,
+        (FoodItem.quantity - func.coalesce(allocated.c.allocated, 0)).label("quantity"),
+        FoodItem.title, FoodItem.description, FoodItem.expiry, FoodItem.latitude, FoodItem.longitude
+    ).outerjoin(allocated, allocated.c.food_item_id == FoodItem.id).where(FoodItem.status == "available")
+
+
+def match_requests_to_food_items(db: Session, item_ids=None, request_ids=None, radius_km: float = None,
+                                 partition: tuple = None):
+    """Match every open request against the available food items in one pass.
+
+    Open requests and available items are loaded once, paired in memory by
+    matching.plan_matches and written back with bulk UPDATEs. With item_ids only
+    those items are offered, to requests in their categories. With request_ids
+    only those requests are matched, against the items of their categories that
+    contain their keywords. Receivers with coordinates are only matched to items
+    within radius_km (MATCH_RADIUS_KM by default, 0 ignores distance).
+
+    Safe to run concurrently: requests and the planned items are claimed with
+    FOR UPDATE SKIP LOCKED, rows another matcher holds are left to it, and
+    requests whose item was taken are re-planned against the rest, up to
+    MATCH_CLAIM_ROUNDS times. With item_ids only the requests planned for the
+    items are claimed, so runs for other new items of the same category still
+    find theirs. partition=(index, count) only takes requests whose
+    id % count == index, so workers can split the backlog between them.
+    """
+    radius_km = settings.MATCH_RADIUS_KM if radius_km is None else radius_km
+
+    conditions = []
+    if item_ids is not None:
+        conditions.append(_serves_any_of(item_ids))
+    if request_ids is not None:
+        conditions.append(Request.id.in_(request_ids))
+    if partition is not None:
+        index, count = partition
+        conditions.append(Request.id % count == index)
+    claim_planned_requests = item_ids is not None
+    if claim_planned_requests:
+        open_requests = db.execute(open_requests_select().where(*conditions).order_by(*REQUEST_PRIORITY)).all()
+    else:
+        open_requests = _claim_open_requests(db, *conditions)
+
+    if not open_requests:
+        db.rollback()
+        return []
+
+    available_items = available_items_select().where(
+        FoodItem.category.in_(list({req.category for req in open_requests}))
     )
+    if item_ids is not None:
+        available_items = available_items.where(FoodItem.id.in_(item_ids))
+    keywords = {req.requested_item for req in open_requests}
+    if request_ids is not None and all(keywords):
+        # Served by the trigram indexes, so a few new requests never load a whole category
+        available_items = available_items.where(or_(*(food_item_keyword_filter(keyword) for keyword in keywords)))
+    available_items = db.execute(available_items.order_by(FoodItem.expiry, FoodItem.id)).all()
+
+    pairs = []
+    for _ in range(MATCH_CLAIM_ROUNDS):
+        planned = plan_matches(open_requests, available_items, radius_km)
+        if not planned:
+            break
+        if claim_planned_requests:
+            requests = _claim_requests(db, [req.id for req, _ in planned])
+        else:
+            requests = {req.id: req for req, _ in planned}
+        claimed = _claim_items(db, [item.id for _, item in planned])
+        won = [
+            (requests[req.id], claimed[item.id]) for req, item in planned
+            if req.id in requests and item.id in claimed and claimed[item.id].quantity >= requests[req.id].quantity
+        ]
+        pairs.extend(won)
+        if len(won) == len(planned):
+            break
+        # Requests taken elsewhere are dropped and free their item for the rest;
+        # items taken elsewhere are dropped and their requests try the next best
+        done = {req.id for req, _ in won} | {req.id for req, _ in planned if req.id not in requests}
+        freed = {item.id: claimed[item.id] for req, item in planned if req.id not in requests and item.id in claimed}
+        planned_items = {item.id for _, item in planned}
+        open_requests = [req for req in open_requests if req.id not in done]
+        available_items = [
+            freed.get(item.id, item) for item in available_items
+            if item.id not in planned_items or item.id in freed
+        ]
+
+    if not pairs:
+        db.rollback()
+        return []
+    _save_matches(db, pairs)
+
+    return [{
+        "request_id": req.id,
+        "matched_food_id": item.id,
+        "requested_item": req.requested_item,
+        "matched_food_title": item.title,
+    } for req, item in pairs]
+
+
+def _claim_open_requests(db: Session, *conditions, order_by=REQUEST_PRIORITY):
+    """Lock the open requests matching conditions, skipping rows another transaction holds.
+
+    The rows are read in a statement of their own once locked, so allocations
+    committed by their previous holder are counted. Returns open_requests_select
+    rows in order_by order.
+    """
+    ids = db.scalars(
+        select(Request.id).where(Request.status == "open", *conditions)
+        .order_by(*order_by).with_for_update(skip_locked=True)
+    ).all()
+    return _read_claimed(db, open_requests_select(), Request.id, ids)
+
+
+def _claim_requests(db: Session, request_ids) -> dict:
+    """Lock the given requests that are still open, skipping rows another transaction holds.
+
+    Returns {id: open_requests_select row} with the quantity left once locked.
+    """
+    locked = []
+    for chunk in _chunks(sorted(set(request_ids))):
+        locked.extend(db.scalars(
+            select(Request.id).where(Request.id.in_(chunk), Request.status == "open")
+            .with_for_update(skip_locked=True)
+        ))
+    return {row.id: row for row in _read_claimed(db, open_requests_select(), Request.id, locked)}
+
+
+def _claim_items(db: Session, item_ids) -> dict:
+    """Lock the given items that are still available, skipping rows another transaction holds.
+
+    Returns {id: available_items_select row} with the quantity left once locked.
+    """
+    locked = []
+    for chunk in _chunks(sorted(set(item_ids))):
+        locked.extend(db.scalars(
+            select(FoodItem.id).where(FoodItem.id.in_(chunk), FoodItem.status == "available")
+            .with_for_update(skip_locked=True)
+        ))
+    return {row.id: row for row in _read_claimed(db, available_items_select(), FoodItem.id, locked)}
+
+
+def _read_claimed(db: Session, query, id_column, ids):
+    position = {row_id: index for index, row_id in enumerate(ids)}
+    rows = []
+    for chunk in _chunks(list(ids)):
+        rows.extend(db.execute(query.where(id_column.in_(chunk))).all())
+    rows.sort(key=lambda row: position[row.id])
+    return rows
+
+
+def _save_matches(db: Session, pairs):
+    """Write (request, item) pairs back with bulk UPDATEs, each item going whole to its request, and commit"""
+    db.execute(
+        update(Request),
+        [{"id": req.id, "status": "matched", "matched_item_id": item.id} for req, item in pairs]
+    )
+    for item_ids in _chunks([item.id for _, item in pairs]):
+        db.query(FoodItem)\
+            .filter(FoodItem.id.in_(item_ids))\
+            .update({FoodItem.status: "matched"}, synchronize_session=False)
+    db.execute(insert(Allocation), [
+        {"request_id": req.id, "food_item_id": item.id, "quantity": req.quantity} for req, item in pairs
+    ])
+    record_status_changes(db, [item for _, item in pairs], "matched")
+    provider_changed(db, *{item.provider_id for _, item in pairs})
+    receiver_changed(db, *{req.receiver_id for req, _ in pairs})
+    for req, item in pairs:
+        notify_status(db, req.receiver_id, "request", req.id, "matched", food_item_id=item.id)
+        notify_status(db, item.provider_id, "food_item", item.id, "matched", request_id=req.id)
+    db.commit()
 
-    open_requests = db.query(Request)\
-        .filter(Request.status == "open")\
-        .order_by(urgency_order)\
-        .all()
 
-    for req in open_requests:
-        potential_match = db.query(FoodItem).filter(
+def match_requests_to_food_items_ai(db: Session, similarity_threshold: float = None, radius_km: float = None):
+    """Match open requests to the semantically closest available food items.
+
+    Item vectors come from embeddings.item_index, which is kept in step with the
+    available items incrementally, so a run only vectorizes the open requests.
+    Every request is scored against every item of the index with batched matrix
+    products and takes its best untaken item of the same category when the
+    similarity reaches the threshold (SEMANTIC_MATCH_THRESHOLD by default).
+    Rows are claimed with FOR UPDATE SKIP LOCKED as in match_requests_to_food_items.
+    """
+    similarity_threshold = settings.SEMANTIC_MATCH_THRESHOLD if similarity_threshold is None else similarity_threshold
+    radius_km = settings.MATCH_RADIUS_KM if radius_km is None else radius_km
+
+    open_requests = _claim_open_requests(db)
+    if not open_requests:
+        db.rollback()
+        return []
+
+    # Every available item is synced, not only the requested categories, so the index stays warm
+    available_items = db.execute(available_items_select().order_by(FoodItem.id)).all()
+    _, vectors = item_index.sync(db, [item.id for item in available_items])
+
+    triples = plan_semantic_matches(open_requests, available_items, vectors, similarity_threshold, radius_km)
+    # Requests whose item a concurrent matcher claimed stay open for the next run
+    claimed = _claim_items(db, [item.id for _, item, _ in triples])
+    triples = [
+        (req, claimed[item.id], similarity) for req, item, similarity in triples
+        if item.id in claimed and claimed[item.id].quantity >= req.quantity
+    ]
+    if not triples:
+        db.rollback()
+        return []
+    _save_matches(db, [(req, item) for req, item, _ in triples])
+
+    return [{
+        "request_id": req.id,
+        "matched_food_id": item.id,
+        "similarity": round(similarity, 3),
+        "requested_item": req.requested_item,
+        "matched_food_title": item.title,
+    } for req, item, similarity in triples]
+
+
+def assign_requests_to_food_items(db: Session, now: datetime = None, radius_km: float = None):
+    """Allocate the unallocated quantities of available items to open requests in one global solve.
+
+    assignment.plan_allocations picks the allocations; they are stored in the
+    allocations table. A request that is covered in full becomes matched (to
+    its largest allocation), a partly covered one stays open for the rest.
+    Items whose whole quantity is allocated become matched. Distance is limited
+    as in match_requests_to_food_items. Requests and candidate items are claimed
+    with FOR UPDATE SKIP LOCKED before the solve, so concurrent runs work on
+    disjoint rows.
+    """
+    now = now or datetime.utcnow()
+    radius_km = settings.MATCH_RADIUS_KM if radius_km is None else radius_km
+    open_requests = _claim_open_requests(db, order_by=(Request.id,))
+    if not open_requests:
+        db.rollback()
+        return []
+
+    # The solve is global, so every candidate item is claimed before it starts
+    candidates = db.scalars(
+        select(FoodItem.id).where(
             FoodItem.status == "available",
-            FoodItem.category == req.category,
-            FoodItem.quantity >= req.quantity,
-            or_(
-                FoodItem.title.ilike(f"%{req.requested_item}%"),
-                FoodItem.description.ilike(f"%{req.requested_item}%")
-            )
-        ).first()
-
-        if potential_match:
-            req.status = "matched"
-            req.matched_item_id = potential_match.id
+            FoodItem.category.in_(list({req.category for req in open_requests})),
+            FoodItem.expiry >= now
+        )
+    ).all()
+    claimed = _claim_items(db, candidates)
+    available_items = [claimed[item_id] for item_id in sorted(claimed)]
+
+    allocations = plan_allocations(open_requests, available_items, now, radius_km)
+    if not allocations:
+        db.rollback()
+        return []
+
+    db.execute(insert(Allocation), [
+        {"request_id": req.id, "food_item_id": item.id, "quantity": quantity}
+        for req, item, quantity in allocations
+    ])
+
+    request_allocated, item_allocated, largest = Counter(), Counter(), {}
+    for req, item, quantity in allocations:
+        request_allocated[req.id] += quantity
+        item_allocated[item.id] += quantity
+        if quantity > largest.get(req.id, (0, None))[0]:
+            largest[req.id] = (quantity, item.id)
+
+    requests = {req.id: req for req, _, _ in allocations}
+    items = {item.id: item for _, item, _ in allocations}
+    filled = [req for req in requests.values() if request_allocated[req.id] >= req.quantity]
+    emptied = [item for item in items.values() if item_allocated[item.id] >= item.quantity]
+
+    if filled:
+        db.execute(
+            update(Request),
+            [{"id": req.id, "status": "matched", "matched_item_id": largest[req.id][1]} for req in filled]
+        )
+    for item_ids in _chunks([item.id for item in emptied]):
+        db.query(FoodItem)\
+            .filter(FoodItem.id.in_(item_ids))\
+            .update({FoodItem.status: "matched"}, synchronize_session=False)
+    record_status_changes(db, emptied, "matched")
+    provider_changed(db, *{item.provider_id for item in items.values()})
+    receiver_changed(db, *{req.receiver_id for req in requests.values()})
+    for req in filled:
+        notify_status(db, req.receiver_id, "request", req.id, "matched", food_item_id=largest[req.id][1])
+    for item in emptied:
+        notify_status(db, item.provider_id, "food_item", item.id, "matched")
+    db.commit()
 
-            potential_match.status = "matched"
+    return [{
+        "request_id": req.id,
+        "food_item_id": item.id,
+        "quantity": quantity,
+        "requested_item": req.requested_item,
+        "matched_food_title": item.title,
+        "request_fully_matched": request_allocated[req.id] >= req.quantity,
+    } for req, item, quantity in allocations]
 
-            db.add_all([req, potential_match])
 
-    db.commit()
-    return matches
+def mark_expired_food_items_as_fulfilled(db: Session, now: datetime = None, chunk_size: int = 5000):
+    """Mark every available or matched item past its expiry as fulfilled.
 
+    Each chunk is a single UPDATE ... WHERE id = ANY(SELECT ... LIMIT chunk_size)
+    RETURNING id, committed on its own so a large backlog never holds one huge
+    transaction. Rows locked by a concurrent writer are skipped and picked up
+    by the next sweep.
+    """
+    now = now or datetime.utcnow()
 
-def mark_expired_food_items_as_fulfilled(db: Session):
-    now = datetime.utcnow()
-
-    expired_items = db.query(FoodItem).filter(
+    expired = select(FoodItem.id).where(
         FoodItem.status.in_(["matched", "available"]),
         FoodItem.expiry < now
-    ).all()
+    ).limit(chunk_size).with_for_update(skip_locked=True)
+    if db.get_bind().dialect.name == "postgresql":
+        # The ids as one array, looked up by primary key; Postgres plans IN (SELECT ...)
+        # as a semi-join that scans all of food_items once a chunk is large
+        ids = select(func.array_agg(expired.subquery().c.id)).scalar_subquery()
+        in_chunk = FoodItem.id == any_(cast(ids, ARRAY(Integer)))
+    else:
+        in_chunk = FoodItem.id.in_(expired.scalar_subquery())
 
     updated_ids = []
-    for item in expired_items:
+    while True:
+        rows = db.execute(
+            update(FoodItem)
+            .where(in_chunk)
+            .values(status="fulfilled")
+            .returning(FoodItem.id, FoodItem.provider_id, FoodItem.category, FoodItem.quantity)
+            .execution_options(synchronize_session=False)
+        ).all()
+        record_status_changes(db, rows, "expired")
+        provider_changed(db, *{row.provider_id for row in rows})
+        for row in rows:
+            notify_status(db, row.provider_id, "food_item", row.id, "fulfilled", reason="expired")
+        db.commit()
+
+        updated_ids.extend(row.id for row in rows)
+        if len(rows) < chunk_size:
+            return updated_ids
+
+
+def _fulfil_allocations(db: Session, condition, now: datetime):
+    """Mark the pending allocations matching condition fulfilled and close the items they complete.
+
+    An item is closed (fulfilled) once it is covered, taken whole by the
+    matcher (status matched) or allocated up to its quantity, and none of its
+    allocations is pending; until then it keeps its status, so unallocated
+    units stay available. The items are locked first, so concurrent
+    fulfilments of one item see each other's allocations. Returns
+    (fulfilled allocations, closed items) and notifies the providers; the
+    caller commits.
+    """
+    item_ids = db.scalars(
+        select(Allocation.food_item_id).where(condition, Allocation.fulfilled_at.is_(None)).distinct()
+    ).all()
+    if not item_ids:
+        return [], []
+    items = {
+        item.id: item for item in db.scalars(
+            select(FoodItem).where(FoodItem.id.in_(item_ids)).order_by(FoodItem.id).with_for_update()
+        )
+    }
+    allocations = db.scalars(
+        select(Allocation).where(condition, Allocation.fulfilled_at.is_(None)).order_by(Allocation.id)
+    ).all()
+    for allocation in allocations:
+        allocation.fulfilled_at = now
+    db.flush()
+
+    totals = db.execute(
+        select(
+            Allocation.food_item_id, func.sum(Allocation.quantity),
+            func.count() - func.count(Allocation.fulfilled_at)
+        ).where(Allocation.food_item_id.in_(list(items))).group_by(Allocation.food_item_id)
+    ).all()
+    closed = [
+        items[item_id] for item_id, allocated, pending in totals
+        if not pending and items[item_id].status != "fulfilled"
+        and (items[item_id].status == "matched" or allocated >= items[item_id].quantity)
+    ]
+    for item in closed:
         item.status = "fulfilled"
-        updated_ids.append(item.id)
 
-    db.commit()
-    return updated_ids
+    record_fulfilled_allocations(
+        db, [(items[allocation.food_item_id], allocation.quantity) for allocation in allocations], closed
+    )
+    provider_changed(db, *{item.provider_id for item in items.values()})
+    for item in closed:
+        notify_status(db, item.provider_id, "food_item", item.id, "fulfilled")
+    return allocations, closed
+
+
+def fulfill_request_allocations(db: Session, request: Request, now: datetime = None) -> int:
+    """Hand over the pending allocations of request, closing the items they complete.
+
+    Returns the quantity allocated to the request in total, fulfilled before or now.
+    """
+    _fulfil_allocations(db, Allocation.request_id == request.id, now or datetime.utcnow())
+    return db.scalar(
+        select(func.coalesce(func.sum(Allocation.quantity), 0)).where(Allocation.request_id == request.id)
+    )
 
 
 def mark_food_as_fulfilled(food_id: int, db: Session):
+    """Hand over a food item to every request it is allocated to.
+
+    Requests that are matched and have nothing else pending become fulfilled;
+    partly covered requests stay open for the rest. The item itself is closed
+    once it is covered (see _fulfil_allocations). Items matched before
+    allocations were recorded go whole to their request.
+    """
     food = db.query(FoodItem).filter(FoodItem.id == food_id).first()
 
     if not food:
         return {"error": "Food item not found."}
 
+    request_ids = db.scalars(
+        select(Allocation.request_id).where(Allocation.food_item_id == food.id, Allocation.fulfilled_at.is_(None))
+    ).all()
+    if not request_ids:
+        return _fulfil_unallocated_match(db, food)
+
+    now = datetime.utcnow()
+    _fulfil_allocations(db, Allocation.food_item_id == food.id, now)
+
+    still_pending = select(Allocation.id).where(
+        Allocation.request_id == Request.id, Allocation.fulfilled_at.is_(None)
+    ).exists()
+    requests = db.scalars(
+        select(Request).where(Request.id.in_(request_ids), Request.status == "matched", ~still_pending)
+    ).all()
+    for request in requests:
+        request.status = "fulfilled"
+        notify_status(db, request.receiver_id, "request", request.id, "fulfilled", food_item_id=food.id)
+    receiver_changed(db, *{request.receiver_id for request in requests})
+    db.commit()
+
+    return {
+        "message": f"Food item handed over to {len(request_ids)} request(s), {len(requests)} fulfilled.",
+        "food_status": food.status,
+    }
+
+
+def _fulfil_unallocated_match(db: Session, food: FoodItem):
     if food.status != "matched":
-        return {"error": "Only matched items can be marked as fulfilled."}
+        return {"error": "Only matched or allocated items can be marked as fulfilled."}
 
     food.status = "fulfilled"
+    record_status_changes(db, [food], "fulfilled")
+    provider_changed(db, food.provider_id)
+    notify_status(db, food.provider_id, "food_item", food.id, "fulfilled")
 
     request = db.query(Request).filter(Request.matched_item_id == food.id).first()
     if request:
         request.status = "fulfilled"
         db.add(request)
+        receiver_changed(db, request.receiver_id)
+        notify_status(db, request.receiver_id, "request", request.id, "fulfilled", food_item_id=food.id)
 
     db.add(food)
     db.commit()
@@ -156,38 +716,99 @@ def mark_food_as_fulfilled(food_id: int, db: Session):
     return {"message": "Food and request marked as fulfilled."}
 
 
-def get_active_inventory(db: Session, provider_id: int):
-    now = datetime.utcnow()
-    soon = now + timedelta(hours=48)
+# Sort options of the active inventory; "condition" is most urgent first, which is expiry order
+INVENTORY_SORTS = {
+    "condition": FoodItem.expiry,
+    "quantity": FoodItem.quantity,
+    "title": FoodItem.title,
+}
+INVENTORY_SORT_TYPES = {"condition": datetime, "quantity": int, "title": str}
+FRESHNESS_CONDITIONS = ("expired", "expiring_soon", "fresh")
+LOW_QUANTITY = 3
 
-    items = db.query(FoodItem).filter(
-        FoodItem.provider_id == provider_id,
-        FoodItem.status.in_(["available", "matched"])
-    ).all()
 
-    result = []
-    for item in items:
-        condition = []
+def inventory_window(now: datetime = None):
+    """(now, soon) bounds of the expired / expiring_soon / fresh buckets"""
+    now = now or datetime.utcnow()
+    return now, now + timedelta(hours=48)
 
-        if item.expiry < now:
-            condition.append("expired")
-        elif item.expiry <= soon:
-            condition.append("expiring_soon")
-        else:
-            condition.append("fresh")
 
-        if item.quantity < 3:
-            condition.append("low_quantity")
-
-        result.append({
-            "id": item.id,
-            "title": item.title,
-            "category": item.category,
-            "condition": ", ".join(condition),
-            "available_until": item.available_until
-        })
+def inventory_condition(now: datetime, soon: datetime):
+    """SQL for the condition label, e.g. 'expiring_soon, low_quantity'"""
+    freshness = case(
+        (FoodItem.expiry < now, "expired"),
+        (FoodItem.expiry <= soon, "expiring_soon"),
+        else_="fresh"
+    )
+    low_quantity = case((FoodItem.quantity < LOW_QUANTITY, ", low_quantity"), else_="")
+    return freshness.concat(low_quantity)
+
+
+def inventory_row(item):
+    return {
+        "id": item.id,
+        "title": item.title,
+        "category": item.category,
+        "condition": item.condition,
+        "available_until": item.available_until
+    }
+
+
+def active_inventory_select(provider_id: int, now: datetime, soon: datetime,
+                            conditions=None, sort: str = "condition", after=None):
+    """A provider's available and matched items with their condition computed in SQL.
+
+    `conditions` keeps items in any of the given freshness buckets, and only
+    low-quantity ones when it contains "low_quantity". `after` is the
+    (sort value, id) of the previous page's last row.
+    """
+    sort_column = INVENTORY_SORTS[sort]
+    stmt = select(
+        FoodItem.id, FoodItem.title, FoodItem.category, FoodItem.available_until,
+        inventory_condition(now, soon).label("condition"), sort_column.label("sort_key")
+    ).where(
+        FoodItem.provider_id == provider_id,
+        FoodItem.status.in_(["available", "matched"])
+    )
 
-    return result
+    if conditions:
+        freshness = {
+            "expired": FoodItem.expiry < now,
+            "expiring_soon": FoodItem.expiry.between(now, soon),
+            "fresh": FoodItem.expiry > soon,
+        }
+        wanted = [freshness[c] for c in FRESHNESS_CONDITIONS if c in conditions]
+        if wanted:
+            stmt = stmt.where(or_(*wanted))
+        if "low_quantity" in conditions:
+            stmt = stmt.where(FoodItem.quantity < LOW_QUANTITY)
+    if after:
+        stmt = stmt.where(tuple_(sort_column, FoodItem.id) > tuple_(*after))
+
+    return stmt.order_by(sort_column, FoodItem.id)
+
+
+def get_active_inventory(db: Session, provider_id: int, conditions=None, sort: str = "condition",
+                         after=None, limit: int = None):
+    """A provider's active inventory, optionally one keyset page of it.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page or without limit.
+    """
+    stmt = active_inventory_select(provider_id, *inventory_window(), conditions, sort, after)
+    if limit is None:
+        return [inventory_row(item) for item in db.execute(stmt)], None
+
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    rows, next_cursor = page_with_cursor(rows, limit, key=lambda row: (row.sort_key, row.id))
+    return [inventory_row(item) for item in rows], next_cursor
+
+
+def iter_active_inventory(db: Session, provider_id: int, conditions=None, sort: str = "condition",
+                          after=None, batch_size: int = 1000):
+    """Stream a provider's active inventory rows through a server-side cursor"""
+    stmt = active_inventory_select(provider_id, *inventory_window(), conditions, sort, after)
+    for item in db.execute(stmt.execution_options(yield_per=batch_size)):
+        yield inventory_row(item)
 
 def submit_feedback(db: Session, receiver_id: int, feedback_data: FeedbackCreate):
     request = db.query(Request).filter(Request.id == feedback_data.request_id).first()
@@ -215,67 +836,71 @@ def submit_feedback(db: Session, receiver_id: int, feedback_data: FeedbackCreate
     return new_feedback
 
 
+# Rows of the receiver's listing (ShelterRequestOut)
+shelter_request_row = shelter_request_out.row
+
+
+def receiver_requests_select(receiver_id: int):
+    return select(Request)\
+        .where(Request.receiver_id == receiver_id)\
+        .order_by(Request.created_at, Request.id)
+
+
 def get_requests_for_receiver(db: Session, receiver_id: int):
-    requests = db.query(Request).filter(Request.receiver_id == receiver_id).all()
-
-    results = []
-    for req in requests:
-        results.append({
-            "id": req.id,
-            "title": req.title,
-            "created_at": req.created_at,
-            "urgency": req.urgency.capitalize(),
-            "status": req.status.capitalize(),
-            "notes": req.notes,
-            "items": [{
-                "name": req.requested_item,
-                "category": req.category,
-                "quantity": req.quantity,
-                "unit": "units"
-            }]
-        })
-
-    return results
-
-# def match_requests_to_food_items_ai(db: Session, similarity_threshold: float = 0.5):
-#     from schema import FoodItem, Request
-#     import torch
-
-#     matches = []
-
-#     open_requests = db.query(Request).filter(Request.status == "open").all()
-#     food_items = db.query(FoodItem).filter(FoodItem.status == "available").all()
-
-#     if not open_requests or not food_items:
-#         return matches
-
-#     food_texts = [f"{item.title} {item.description or ''}" for item in food_items]
-#     food_embeddings = model.encode(food_texts, convert_to_tensor=True)
-
-#     for req in open_requests:
-#         req_text = f"{req.requested_item} {req.notes or ''}"
-#         req_embedding = model.encode(req_text, convert_to_tensor=True)
-
-#         cosine_scores = util.cos_sim(req_embedding, food_embeddings)[0]
-
-#         best_idx = torch.argmax(cosine_scores).item()
-#         best_score = cosine_scores[best_idx].item()
-
-#         if best_score >= similarity_threshold:
-#             matched_food = food_items[best_idx]
-
-#             req.status = "matched"
-#             req.matched_item_id = matched_food.id
-#             matched_food.status = "matched"
-
-#             db.add_all([req, matched_food])
-#             matches.append({
-#                 "request_id": req.id,
-#                 "matched_food_id": matched_food.id,
-#                 "similarity": round(best_score, 3),
-#                 "requested_item": req.requested_item,
-#                 "matched_food_title": matched_food.title,
-#             })
-
-#     db.commit()
-#     return matches
\ No newline at end of file
+    requests = db.execute(receiver_requests_select(receiver_id)).scalars().all()
+    return [shelter_request_row(req) for req in requests]
+
+
+def iter_requests_for_receiver(db: Session, receiver_id: int, batch_size: int = 1000):
+    """Stream a receiver's requests through a server-side cursor"""
+    stmt = receiver_requests_select(receiver_id).execution_options(yield_per=batch_size)
+    for req in db.execute(stmt).scalars():
+        yield shelter_request_row(req)
+
+
+def requests_listing_select(statuses=None, after=None):
+    """Requests of all receivers with the receiver's name, newest first"""
+    stmt = select(
+        Request.id, Request.title, Request.created_at, Request.urgency, Request.status,
+        Request.notes, Request.requested_item, Request.category, Request.quantity,
+        Request.matched_item_id, func.coalesce(func.nullif(User.name, ""), "Unknown").label("receiver_name")
+    ).outerjoin(User, User.id == Request.receiver_id)
+
+    if statuses:
+        stmt = stmt.where(Request.status.in_(statuses))
+    if after:
+        stmt = stmt.where(tuple_(Request.created_at, Request.id) < tuple_(*after))
+
+    return stmt.order_by(Request.created_at.desc(), Request.id.desc())
+
+
+# Rows of the /all-requests listing
+request_listing_row = request_listing_out.row
+
+
+def page_with_cursor(rows, limit: int, key=lambda row: (row.created_at, row.id)):
+    """Cut a limit + 1 row fetch down to one page and the next page's cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def get_requests_page(db: Session, statuses=None, after=None, limit: int = 100):
+    """One page of requests from all receivers, newest first.
+
+    The receiver name comes from the same joined query and pages are cut with a
+    keyset on (created_at, id), so every page costs one indexed query however
+    large the table is. `after` is the (created_at, id) of the previous page's
+    last row. Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = db.execute(requests_listing_select(statuses, after).limit(limit + 1)).all()
+    rows, next_cursor = page_with_cursor(rows, limit)
+    return [request_listing_row(req) for req in rows], next_cursor
+
+
+def iter_requests(db: Session, statuses=None, after=None, batch_size: int = 1000):
+    """Stream every request matching the filters through a server-side cursor"""
+    stmt = requests_listing_select(statuses, after).execution_options(yield_per=batch_size)
+    for req in db.execute(stmt):
+        yield request_listing_row(req)
@@ -0,0 +1,265 @@
+# Local text vectors for semantic matching: a hashed character n-gram vectorizer
+# (or an optional sentence-transformers model), item vectors persisted as float32
+# bytes in food_item_embeddings, and an in-process index kept in step with them
+import re
+import threading
+from collections import defaultdict
+import zlib
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from config.database import dialect_insert
+from config.settings import settings
+from geo import location_of, distances_km
+from schema import FoodItem, FoodItemEmbedding
+
+_WORD = re.compile(r"\w+")
+
+
+class HashingVectorizer:
+    """Character n-grams of every word, hashed into a fixed number of buckets.
+
+    Counts are damped with 1 + log(tf) and the vector is L2-normalized. No
+    vocabulary is kept, so vectors can be computed one item at a time, offline,
+    and stay valid as the corpus grows; IDF weights are applied at scoring time
+    from the document frequencies of the index (see similarity_batches).
+    """
+
+    uses_idf = True
+
+    def __init__(self, dim: int = 512, ngram_range=(3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing-{dim}-{ngram_range[0]}-{ngram_range[1]}"
+
+    def _features(self, text: str):
+        low, high = self.ngram_range
+        for word in _WORD.findall((text or "").lower()):
+            padded = f" {word} ".encode()
+            for n in range(low, high + 1):
+                for start in range(max(len(padded) - n + 1, 1)):
+                    yield zlib.crc32(padded[start:start + n])
+
+    def encode(self, texts) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter(self._features(text), dtype=np.uint32)
+            if not len(hashes):
+                continue
+            # The top hash bit picks the sign, so colliding n-grams tend to cancel out
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+            counts = np.zeros(self.dim)
+            np.add.at(counts, hashes % self.dim, signs)
+            vectors[row] = np.sign(counts) * np.log1p(np.abs(counts))
+        return _normalized(vectors)
+
+
+class SentenceTransformerVectorizer:
+    """A sentence-transformers model, for deployments that have it installed and downloaded"""
+
+    uses_idf = False
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name)
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def encode(self, texts) -> np.ndarray:
+        return self._model.encode(list(texts), normalize_embeddings=True).astype(np.float32)
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+_vectorizer = None
+_vectorizer_lock = threading.Lock()
+
+
+def get_vectorizer():
+    """The vectorizer named by EMBEDDING_MODEL: "hashing" or "sentence-transformers:<model name>" """
+    global _vectorizer
+    with _vectorizer_lock:
+        if _vectorizer is None:
+            kind, _, model_name = settings.EMBEDDING_MODEL.partition(":")
+            if kind == "sentence-transformers":
+                _vectorizer = SentenceTransformerVectorizer(model_name)
+            else:
+                _vectorizer = HashingVectorizer(settings.EMBEDDING_DIM)
+        return _vectorizer
+
+
+def item_text(item) -> str:
+    return f"{item.title or ''} {item.description or ''}"
+
+
+def request_text(req) -> str:
+    # Notes are mostly pickup logistics and only dilute the similarity
+    return req.requested_item or ""
+
+
+def store_item_embeddings(db: Session, items):
+    """Vectorize new or edited food items and persist their vectors; call before the transaction commits.
+
+    `items` need id, title and description. Returns the vectors, one row per item.
+    """
+    items = list(items)
+    vectorizer = get_vectorizer()
+    if not items:
+        return np.zeros((0, vectorizer.dim), np.float32)
+    vectors = vectorizer.encode([item_text(item) for item in items])
+    insert = dialect_insert(db)
+    for start in range(0, len(items), 1000):
+        stmt = insert(FoodItemEmbedding).values([
+            {"food_item_id": item.id, "model": vectorizer.name, "vector": vector.tobytes()}
+            for item, vector in zip(items[start:start + 1000], vectors[start:start + 1000])
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["food_item_id"],
+            set_={"model": stmt.excluded.model, "vector": stmt.excluded.vector},
+        ))
+    return vectors
+
+
+class EmbeddingIndex:
+    """Vectors of the available food items, held as one float32 matrix.
+
+    sync() brings it in line with the available items incrementally: vectors of
+    items that are no longer available are dropped, vectors of new items are
+    read from food_item_embeddings, and items without a stored vector (posted
+    before the table existed, or under another model) are vectorized and stored.
+    """
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = None
+        self.model = None
+        self._lock = threading.Lock()
+
+    def sync(self, db: Session, available_ids):
+        vectorizer = get_vectorizer()
+        available_ids = np.array(sorted(available_ids), dtype=np.int64)
+        with self._lock:
+            if self.model != vectorizer.name:
+                self.ids, self.vectors, self.model = np.zeros(0, dtype=np.int64), None, vectorizer.name
+            keep = np.isin(self.ids, available_ids)
+            ids, vectors = self.ids[keep], (self.vectors[keep] if self.vectors is not None else None)
+
+            missing = np.setdiff1d(available_ids, ids)
+            if len(missing):
+                new_ids, new_vectors = self._load(db, vectorizer, missing.tolist())
+                ids = np.concatenate([ids, new_ids])
+                vectors = new_vectors if vectors is None else np.vstack([vectors, new_vectors])
+
+            order = np.argsort(ids)
+            self.ids = ids[order]
+            self.vectors = vectors[order] if vectors is not None else np.zeros((0, vectorizer.dim), np.float32)
+            return self.ids, self.vectors
+
+    def _load(self, db: Session, vectorizer, ids):
+        found_ids, found = [], []
+        for start in range(0, len(ids), 5000):
+            rows = db.execute(
+                select(FoodItemEmbedding.food_item_id, FoodItemEmbedding.vector).where(
+                    FoodItemEmbedding.food_item_id.in_(ids[start:start + 5000]),
+                    FoodItemEmbedding.model == vectorizer.name
+                )
+            )
+            for row in rows:
+                found_ids.append(row.food_item_id)
+                found.append(np.frombuffer(row.vector, dtype=np.float32))
+
+        unvectorized = sorted(set(ids) - set(found_ids))
+        if unvectorized:
+            items = []
+            for start in range(0, len(unvectorized), 5000):
+                items.extend(db.execute(
+                    select(FoodItem.id, FoodItem.title, FoodItem.description)
+                    .where(FoodItem.id.in_(unvectorized[start:start + 5000]))
+                ).all())
+            found_ids.extend(item.id for item in items)
+            found.extend(store_item_embeddings(db, items))
+
+        vectors = np.vstack(found).astype(np.float32) if found else np.zeros((0, vectorizer.dim), np.float32)
+        return np.array(found_ids, dtype=np.int64), vectors
+
+
+item_index = EmbeddingIndex()
+
+
+def idf_weights(vectors: np.ndarray) -> np.ndarray:
+    """Smoothed inverse document frequency of each dimension over the indexed items"""
+    document_frequency = np.count_nonzero(vectors, axis=0)
+    return (np.log((1 + len(vectors)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+
+def idf_weighted(query_vectors: np.ndarray, item_vectors: np.ndarray):
+    """Re-weight both sides by the IDF of the indexed items and re-normalize"""
+    weights = idf_weights(item_vectors)
+    return _normalized(query_vectors * weights), _normalized(item_vectors * weights)
+
+
+def similarity_batches(query_vectors: np.ndarray, item_vectors: np.ndarray, batch_size: int = 1024):
+    """Yield (start, cosine similarity block) for batches of queries against every item.
+
+    Both sides must be normalized; each block is one (batch, items) float32 matrix product.
+    """
+    item_vectors_t = np.ascontiguousarray(item_vectors.T)
+    for start in range(0, len(query_vectors), batch_size):
+        yield start, query_vectors[start:start + batch_size] @ item_vectors_t
+
+
+def plan_semantic_matches(requests, items, item_vectors: np.ndarray, threshold: float,
+                          radius_km: float = None, batch_size: int = 1024):
+    """Pair each request with its most similar untaken item of the same category.
+
+    `requests` should be in priority order and need id, category, quantity and
+    requested_item; `items` need id, category and quantity, row i matching
+    item_vectors[i]. Rows may carry latitude and longitude, limited by radius_km
+    as in matching.plan_matches. The requests of a category are scored against
+    the items of that category in batches, one float32 matrix product each.
+    Returns (request, item, similarity) triples.
+    """
+    if not requests or not items:
+        return []
+    vectorizer = get_vectorizer()
+    request_vectors = vectorizer.encode([request_text(req) for req in requests])
+    if vectorizer.uses_idf:
+        request_vectors, item_vectors = idf_weighted(request_vectors, item_vectors)
+
+    items_by_category, requests_by_category = defaultdict(list), defaultdict(list)
+    for index, item in enumerate(items):
+        items_by_category[item.category].append(index)
+    for index, req in enumerate(requests):
+        requests_by_category[req.category].append(index)
+
+    pairs = []
+    for category, request_indexes in requests_by_category.items():
+        item_indexes = items_by_category.get(category)
+        if not item_indexes:
+            continue
+        category_items = [items[j] for j in item_indexes]
+        quantity = np.array([item.quantity for item in category_items])
+        points = np.array([location_of(item) or (np.nan, np.nan) for item in category_items], dtype=float)
+        available = np.ones(len(category_items), dtype=bool)
+
+        blocks = similarity_batches(request_vectors[request_indexes], item_vectors[item_indexes], batch_size)
+        for start, scores in blocks:
+            for i, row in zip(request_indexes[start:start + batch_size], scores):
+                req = requests[i]
+                eligible = available & (quantity >= req.quantity)
+                location = location_of(req)
+                if location is not None and radius_km:
+                    eligible &= ~(distances_km(location, points) > radius_km)
+                if not eligible.any():
+                    continue
+                best = int(np.argmax(np.where(eligible, row, -np.inf)))
+                if row[best] >= threshold:
+                    available[best] = False
+                    pairs.append((i, category_items[best], float(row[best])))
+
+    # Back to the priority order of the requests
+    pairs.sort(key=lambda pair: pair[0])
+    return [(requests[i], item, similarity) for i, item, similarity in pairs]
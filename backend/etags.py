@@ -0,0 +1,29 @@
+# Weak ETags for the polled listing endpoints, derived from changes.py version counters
+import hashlib
+from typing import Optional
+from fastapi import Response
+
+
+def listing_etag(version: int, *params) -> str:
+    """ETag of one listing response: its collection version plus the query that shaped it"""
+    digest = hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_response(response: Response, if_none_match: Optional[str], etag: str):
+    """A 304 when the client's copy is current, otherwise None after tagging response"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,78 @@
+# Distances and radius lookups over (latitude, longitude) points, used by matching,
+# assignment and the nearby food query
+import math
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def location_of(row):
+    """(latitude, longitude) of a row, None when it has no coordinates"""
+    latitude = getattr(row, "latitude", None)
+    longitude = getattr(row, "longitude", None)
+    if latitude is None or longitude is None:
+        return None
+    return latitude, longitude
+
+
+def distance_km(a, b) -> float:
+    """Great-circle (haversine) distance between two (latitude, longitude) points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def distances_km(center, points) -> np.ndarray:
+    """Haversine distances from center to an (n, 2) array of (latitude, longitude) points"""
+    lat1, lon1 = np.radians(center)
+    lat2, lon2 = np.radians(np.asarray(points, dtype=float).reshape(-1, 2)).T
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def bounding_box(center, radius_km: float):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing the circle, for index range scans.
+
+    Near the poles, or when the box would cross the antimeridian, the longitude
+    range is widened to the whole circle.
+    """
+    latitude, longitude = center
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - delta_lat, latitude + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    delta_lon = math.degrees(math.asin(math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))))
+    min_lon, max_lon = longitude - delta_lon, longitude + delta_lon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def _unit_vectors(points) -> np.ndarray:
+    latitudes, longitudes = np.radians(np.asarray(points, dtype=float).reshape(-1, 2)).T
+    return np.column_stack([
+        np.cos(latitudes) * np.cos(longitudes),
+        np.cos(latitudes) * np.sin(longitudes),
+        np.sin(latitudes),
+    ])
+
+
+class PointIndex:
+    """KD-tree over points on the unit sphere answering "which points are within r km".
+
+    A great-circle radius is a fixed chord length on the sphere, so a ball query
+    in 3D returns exactly the points within the radius, in time proportional to
+    the points found rather than to the size of the index.
+    """
+
+    def __init__(self, points):
+        self.size = len(points)
+        self._tree = cKDTree(_unit_vectors(points)) if points else None
+
+    def within(self, center, radius_km: float) -> list:
+        """Positions of the indexed points within radius_km of center, in index order"""
+        if self._tree is None:
+            return []
+        chord = 2 * math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2)
+        return sorted(self._tree.query_ball_point(_unit_vectors([center])[0], chord * (1 + 1e-9)))
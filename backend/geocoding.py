@@ -0,0 +1,186 @@
+# Offline geocoding of the free-text locations on users and food items.
+# Coordinates come from the geocode_cache table, filled from a lookup table by
+#   python geocoding.py load places.csv
+# and existing rows are given coordinates by
+#   python geocoding.py backfill
+import csv
+import re
+import sys
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from config.database import dialect_insert
+from schema import User, FoodItem, GeocodeCache
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_location(text: str) -> str:
+    """Lower-cased words of a location, punctuation and extra spaces dropped"""
+    return " ".join(_NON_WORD.split((text or "").lower())).strip()
+
+
+def location_keys(text: str) -> list:
+    """Cache keys to try for a location, most specific first.
+
+    "12 Market St, Springfield, IL" tries the whole address, then
+    "springfield il", then "il".
+    """
+    parts = [normalize_location(part) for part in (text or "").split(",")]
+    parts = [part for part in parts if part]
+    return [" ".join(parts[start:]) for start in range(len(parts))]
+
+
+def geocode_many(db: Session, texts) -> dict:
+    """Resolve locations through the geocode cache in one round trip per 1000 keys.
+
+    Returns {text: (latitude, longitude)} for the texts that resolved. A text
+    resolved through a shorter key is cached under its own key as "derived";
+    that row is written in the caller's transaction.
+    """
+    keys = {text: location_keys(text) for text in set(texts) if text}
+    wanted = sorted({key for text_keys in keys.values() for key in text_keys})
+    found = {}
+    for start in range(0, len(wanted), 1000):
+        rows = db.execute(
+            select(GeocodeCache.query, GeocodeCache.latitude, GeocodeCache.longitude)
+            .where(GeocodeCache.query.in_(wanted[start:start + 1000]))
+        )
+        found.update((row.query, (row.latitude, row.longitude)) for row in rows)
+
+    resolved, derived = {}, {}
+    for text, text_keys in keys.items():
+        for key in text_keys:
+            if key in found:
+                resolved[text] = found[key]
+                if key != text_keys[0]:
+                    derived[text_keys[0]] = found[key]
+                break
+
+    if derived:
+        insert = dialect_insert(db)
+        db.execute(insert(GeocodeCache).values([
+            {"query": key, "latitude": latitude, "longitude": longitude, "source": "derived"}
+            for key, (latitude, longitude) in sorted(derived.items())
+        ]).on_conflict_do_nothing(index_elements=["query"]))
+    return resolved
+
+
+def geocode(db: Session, text: str):
+    """(latitude, longitude) of one location, None when it is not in the cache"""
+    return geocode_many(db, [text]).get(text)
+
+
+def food_item_coordinates(db: Session, pickups) -> list:
+    """(latitude, longitude) for each (provider_id, pickup_location) pair.
+
+    The pickup location wins; items whose pickup location does not resolve get
+    their provider's coordinates, which may be (None, None) too.
+    """
+    pickups = list(pickups)
+    resolved = geocode_many(db, [location for _, location in pickups])
+    missing = {provider_id for provider_id, location in pickups if location not in resolved}
+    providers = {}
+    if missing:
+        providers = {
+            row.id: (row.latitude, row.longitude)
+            for row in db.execute(
+                select(User.id, User.latitude, User.longitude).where(User.id.in_(missing))
+            )
+        }
+    return [
+        resolved.get(location) or providers.get(provider_id, (None, None))
+        for provider_id, location in pickups
+    ]
+
+
+def load_lookup_table(db: Session, path: str) -> int:
+    """Upsert a CSV of location,latitude,longitude rows into the geocode cache"""
+    insert = dialect_insert(db)
+    count = 0
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.DictReader(file)
+        batch = {}
+        for row in reader:
+            key = normalize_location(row.get("location") or row.get("name"))
+            if not key:
+                continue
+            batch[key] = {
+                "query": key,
+                "latitude": float(row.get("latitude") or row["lat"]),
+                "longitude": float(row.get("longitude") or row.get("lon") or row["lng"]),
+                "source": "lookup",
+            }
+            if len(batch) >= 1000:
+                count += _upsert_lookup_rows(db, insert, batch)
+        count += _upsert_lookup_rows(db, insert, batch)
+    db.commit()
+    return count
+
+
+def _upsert_lookup_rows(db: Session, insert, batch: dict) -> int:
+    if not batch:
+        return 0
+    stmt = insert(GeocodeCache).values(list(batch.values()))
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["query"],
+        set_={"latitude": stmt.excluded.latitude, "longitude": stmt.excluded.longitude, "source": stmt.excluded.source},
+    ))
+    count = len(batch)
+    batch.clear()
+    return count
+
+
+def backfill_coordinates(db: Session, batch_size: int = 5000) -> dict:
+    """Give coordinates to users, then food items, that have none yet; returns the counts updated"""
+    counts = {"users": 0, "food_items": 0}
+
+    users = db.execute(select(User.id, User.location).where(User.latitude.is_(None))).all()
+    resolved = geocode_many(db, [user.location for user in users])
+    located = [
+        {"id": user.id, "latitude": resolved[user.location][0], "longitude": resolved[user.location][1]}
+        for user in users if user.location in resolved
+    ]
+    if located:
+        db.execute(update(User), located)
+    db.commit()
+    counts["users"] = len(located)
+
+    after = 0
+    while True:
+        items = db.execute(
+            select(FoodItem.id, FoodItem.provider_id, FoodItem.pickup_location)
+            .where(FoodItem.latitude.is_(None), FoodItem.id > after)
+            .order_by(FoodItem.id).limit(batch_size)
+        ).all()
+        if not items:
+            break
+        after = items[-1].id
+        coordinates = food_item_coordinates(db, [(item.provider_id, item.pickup_location) for item in items])
+        located = [
+            {"id": item.id, "latitude": latitude, "longitude": longitude}
+            for item, (latitude, longitude) in zip(items, coordinates) if latitude is not None
+        ]
+        if located:
+            db.execute(update(FoodItem), located)
+        db.commit()
+        counts["food_items"] += len(located)
+    return counts
+
+
+if __name__ == "__main__":
+    from config.database import SessionLocal
+    if len(sys.argv) == 3 and sys.argv[1] == "load":
+        session = SessionLocal()
+        try:
+            print(f"{load_lookup_table(session, sys.argv[2])} locations loaded into the geocode cache")
+        finally:
+            session.close()
+    elif len(sys.argv) == 2 and sys.argv[1] == "backfill":
+        session = SessionLocal()
+        try:
+            counts = backfill_coordinates(session)
+            print(f"Coordinates set on {counts['users']} users and {counts['food_items']} food items")
+        finally:
+            session.close()
+    else:
+        print("Usage: python geocoding.py load <places.csv> | python geocoding.py backfill")
@@ -0,0 +1,209 @@
+# CSV inventory imports: parsed as a stream, validated, COPYed into a staging table
+# and merged into food_items one chunk at a time
+import csv
+import io
+import os
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, Float, String, Text, DateTime, MetaData, select, insert, delete, update, literal
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from config.logging_config import get_logger
+from crud import validate_food_item_batch, page_with_cursor
+from models import FoodItemCreate
+from rollups import record_donations
+from changes import provider_changed
+from geocoding import food_item_coordinates
+from embeddings import store_item_embeddings
+from schema import FoodItem, FoodItemImport, FoodItemImportError
+
+logger = get_logger(__name__)
+
+STAGED_COLUMNS = (
+    "title", "description", "category", "quantity", "expiry",
+    "available_from", "available_until", "pickup_location", "latitude", "longitude",
+)
+
+# Session-private staging table, never part of Base.metadata or the migrations
+staging = Table(
+    "food_item_import_staging", MetaData(),
+    Column("line", Integer, nullable=False),
+    Column("title", String(100), nullable=False),
+    Column("description", Text),
+    Column("category", String(50)),
+    Column("quantity", Integer, nullable=False),
+    Column("expiry", DateTime, nullable=False),
+    Column("available_from", DateTime),
+    Column("available_until", DateTime),
+    Column("pickup_location", Text),
+    Column("latitude", Float),
+    Column("longitude", Float),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DELETE ROWS",
+)
+
+# Header spellings accepted for each FoodItemCreate field: "Pickup Location", "pickupLocation", ...
+_HEADER_FIELDS = {name.replace("_", ""): name for name in FoodItemCreate.model_fields}
+
+
+def _field_for_header(header: str):
+    return _HEADER_FIELDS.get("".join(ch for ch in (header or "").lower() if ch.isalnum()))
+
+
+def read_csv_chunks(file, chunk_size: int):
+    """Yield lists of (line number, raw row dict) from a binary CSV file, chunk_size rows at a time"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [_field_for_header(column) for column in header]
+
+    chunk = []
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        raw = {"description": None}
+        for field, value in zip(fields, values):
+            if field:
+                raw[field] = value.strip() or None
+        chunk.append((reader.line_num, raw))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _staged_row(line: int, item: FoodItemCreate, coordinates) -> dict:
+    row = {"line": line, **item.model_dump(include=set(STAGED_COLUMNS))}
+    row["category"] = item.category.value
+    row["latitude"], row["longitude"] = coordinates
+    return row
+
+
+def _copy_into_staging(db: Session, rows):
+    """Load rows into the staging table, through COPY on Postgres"""
+    connection = db.connection()
+    connection.execute(CreateTable(staging, if_not_exists=True))
+    if connection.dialect.name != "postgresql":
+        connection.execute(delete(staging))
+        connection.execute(insert(staging), rows)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row["line"], *(row[column] for column in STAGED_COLUMNS)])
+
+    copy_sql = f"COPY {staging.name} (line, {', '.join(STAGED_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    with connection.connection.dbapi_connection.cursor() as cursor, cursor.copy(copy_sql) as copy:
+        copy.write(buffer.getvalue())
+
+
+def _merge_staging(db: Session, provider_id: int):
+    """INSERT ... SELECT the staged rows into food_items, returning what the rollups and embeddings need"""
+    columns = ["provider_id", *STAGED_COLUMNS, "status"]
+    rows = select(
+        literal(provider_id), *(staging.c[column] for column in STAGED_COLUMNS), literal("available")
+    ).order_by(staging.c.line)
+    stmt = insert(FoodItem.__table__).from_select(columns, rows).returning(
+        FoodItem.id, FoodItem.provider_id, FoodItem.category, FoodItem.quantity, FoodItem.title, FoodItem.description
+    )
+    return db.execute(stmt).all()
+
+
+def import_chunk(db: Session, food_import: FoodItemImport, chunk):
+    """Validate, stage and merge one chunk of CSV rows, then commit it with the progress counters"""
+    valid, errors = validate_food_item_batch([raw for _, raw in chunk])
+
+    created = []
+    if valid:
+        coordinates = food_item_coordinates(db, [(food_import.provider_id, item.pickup_location) for _, item in valid])
+        _copy_into_staging(db, [
+            _staged_row(chunk[index][0], item, point) for (index, item), point in zip(valid, coordinates)
+        ])
+        created = _merge_staging(db, food_import.provider_id)
+        record_donations(db, created)
+        store_item_embeddings(db, created)
+        provider_changed(db, food_import.provider_id)
+    if errors:
+        db.execute(insert(FoodItemImportError), [{
+            "import_id": food_import.id,
+            "line": chunk[error["index"]][0],
+            "errors": error["errors"],
+            "raw": chunk[error["index"]][1],
+        } for error in errors])
+
+    db.execute(
+        update(FoodItemImport).where(FoodItemImport.id == food_import.id).values(
+            rows_processed=FoodItemImport.rows_processed + len(chunk),
+            rows_imported=FoodItemImport.rows_imported + len(created),
+            rows_failed=FoodItemImport.rows_failed + len(errors),
+        ).execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def create_import(db: Session, provider_id: int, filename: str) -> FoodItemImport:
+    food_import = FoodItemImport(provider_id=provider_id, filename=filename, status="pending")
+    db.add(food_import)
+    db.commit()
+    db.refresh(food_import)
+    return food_import
+
+
+def run_import(session_factory, import_id: int, path: str, chunk_size: int = 5000):
+    """Import the CSV file at path, then delete it. Meant to run as a background task."""
+    db = session_factory()
+    try:
+        food_import = db.get(FoodItemImport, import_id)
+        food_import.status = "running"
+        db.commit()
+
+        with open(path, "rb") as file:
+            for chunk in read_csv_chunks(file, chunk_size):
+                import_chunk(db, food_import, chunk)
+
+        food_import.status = "completed"
+        food_import.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as exc:
+        logger.error(f"Import {import_id} failed: {exc}")
+        db.rollback()
+        db.execute(
+            update(FoodItemImport).where(FoodItemImport.id == import_id)
+            .values(status="failed", error=str(exc), finished_at=datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+        os.remove(path)
+
+
+def import_progress(food_import: FoodItemImport) -> dict:
+    return {
+        "id": food_import.id,
+        "filename": food_import.filename,
+        "status": food_import.status,
+        "rows_processed": food_import.rows_processed,
+        "rows_imported": food_import.rows_imported,
+        "rows_failed": food_import.rows_failed,
+        "error": food_import.error,
+        "created_at": food_import.created_at,
+        "finished_at": food_import.finished_at,
+    }
+
+
+def get_import_errors_page(db: Session, import_id: int, after=None, limit: int = 100):
+    """One page of an import's error rows in line order.
+
+    `after` is the (line,) of the previous page's last row. Returns (rows, next_cursor).
+    """
+    stmt = select(FoodItemImportError.line, FoodItemImportError.errors, FoodItemImportError.raw)\
+        .where(FoodItemImportError.import_id == import_id)
+    if after:
+        stmt = stmt.where(FoodItemImportError.line > after[0])
+    rows = db.execute(stmt.order_by(FoodItemImportError.line).limit(limit + 1)).all()
+
+    rows, next_cursor = page_with_cursor(rows, limit, key=lambda row: (row.line,))
+    return [{"line": row.line, "errors": row.errors, "raw": row.raw} for row in rows], next_cursor
@@ -1,9 +1,29 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import psycopg2
 from routes import app_router
+from async_routes import async_app_router
+from config.settings import settings
+from cache import cache_stats
+from config.database import engine_pool_stats
+from config.replicas import replicas, replica_stats, ReadYourWritesMiddleware
+from scheduler import scheduler
+from notifications import broker
+from pubsub import listener
+from serializers import FastJSONResponse
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler.start()
+    listener.start()
+    broker.start()
+    yield
+    await broker.stop()
+    await listener.stop()
+    await scheduler.stop()
+
+# orjson for every handler that returns plain data
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],  # Allow requests from your frontend
@@ -11,8 +31,24 @@ app.add_middleware(
     allow_methods=["*"],  # Allow all HTTP methods (GET, POST, etc.)
     allow_headers=["*"],  # Allow all headers
 )
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+if settings.DB_ASYNC:
+    # Registered first so these async handlers take precedence over the sync ones
+    app.include_router(async_app_router)
 app.include_router(app_router)
 
 @app.get("/")
 async def root():
-    return {"message": "SecondServing Backend is running!"}
\ No newline at end of file
+    return {"message": "SecondServing Backend is running!"}
+
+@app.get("/internal/metrics", include_in_schema=False)
+async def internal_metrics():
+    """Process-local counters for capacity planning, off unless INTERNAL_METRICS_ENABLED is set."""
+    if not settings.INTERNAL_METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        "pools": {**engine_pool_stats(), **replica_stats()},
+        "caches": cache_stats(),
+        "event_streams": broker.stream_count,
+    }
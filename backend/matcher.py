@@ -0,0 +1,52 @@
+# Runs the greedy matcher in parallel worker processes, each over its own
+# partition of the open requests:
+#   python matcher.py [workers]
+# Requests and items are claimed with FOR UPDATE SKIP LOCKED (see
+# crud.match_requests_to_food_items), so workers, API processes and cron runs
+# never allocate the same item twice.
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config.database import SessionLocal
+from config.settings import settings
+from crud import match_requests_to_food_items
+
+
+def run_partition(index: int, count: int, start_at: float = None):
+    """Match one partition of the open requests; returns (matches, seconds)"""
+    db = SessionLocal()
+    # A forked worker inherits the parent's pooled connections, which it must not use
+    db.get_bind().dispose(close=False)
+    if start_at is not None:
+        time.sleep(max(0.0, start_at - time.time()))
+    started = time.perf_counter()
+    try:
+        matches = match_requests_to_food_items(db, partition=(index, count) if count > 1 else None)
+    finally:
+        db.close()
+    return len(matches), time.perf_counter() - started
+
+
+def run_parallel(workers: int = None, partitioned: bool = True):
+    """Run the matcher in `workers` processes at once (MATCH_WORKERS by default).
+
+    Each process takes requests whose id % workers is its index; with
+    partitioned=False every process competes for all open requests, which only
+    SKIP LOCKED keeps apart. Returns [(matches, seconds)] per worker.
+    """
+    workers = workers or settings.MATCH_WORKERS
+    # Workers start together once the pool has spun up
+    start_at = time.time() + 0.5
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_partition, index, workers if partitioned else 1, start_at)
+            for index in range(workers)
+        ]
+        return [future.result() for future in futures]
+
+
+if __name__ == "__main__":
+    results = run_parallel(int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    matches = sum(count for count, _ in results)
+    seconds = max(elapsed for _, elapsed in results)
+    print(f"{len(results)} worker(s) created {matches} match(es) in {seconds:.2f}s")
@@ -0,0 +1,125 @@
+# In-memory matching engine used by crud.match_requests_to_food_items
+from bisect import bisect_left
+from collections import defaultdict
+from geo import location_of, PointIndex
+
+URGENCY_RANK = {"high": 1, "medium": 2, "low": 3}
+
+
+def urgency_rank(urgency: str) -> int:
+    """Sort key for request urgency, unknown values go last"""
+    return URGENCY_RANK.get(urgency, 4)
+
+
+def keyword_text(title: str, description: str) -> str:
+    """Lower-cased searchable text of a food item, title and description kept apart.
+
+    Substring tests against it mirror search.food_item_keyword_filter in SQL.
+    """
+    return f"{(title or '').lower()}\x00{(description or '').lower()}"
+
+
+class _Candidates:
+    """Items of one (category, keyword) in preference order, with a spatial index built on demand"""
+
+    def __init__(self, items):
+        self.items = items
+        self.head = 0  # everything before head is taken
+        self._located = None
+        self._unlocated = None
+        self._points = None
+        self._near = {}  # requests of one receiver share a location
+
+    def near(self, center, radius_km: float):
+        """Positions from head on of the items within radius_km of center and of the items without coordinates"""
+        if self._points is None:
+            self._located, self._unlocated, points = [], [], []
+            for position, item in enumerate(self.items):
+                location = location_of(item)
+                if location is None:
+                    self._unlocated.append(position)
+                else:
+                    self._located.append(position)
+                    points.append(location)
+            self._points = PointIndex(points)
+        key = (center, radius_km)
+        positions = self._near.get(key)
+        if positions is None:
+            positions = [self._located[k] for k in self._points.within(center, radius_km)]
+            positions.extend(self._unlocated)
+            positions.sort()
+            self._near[key] = positions
+        return positions[bisect_left(positions, self.head):]
+
+
+class CandidateIndex:
+    """Available food items grouped by category, with candidate lists per keyword.
+
+    Each (category, keyword) list is built once and shared by every request asking
+    for the same thing, so a run costs one scan of the category per distinct keyword
+    instead of one query per request. With a radius, requests that have coordinates
+    only see items within it (items without coordinates are always in range), found
+    through a KD-tree per list.
+    """
+
+    def __init__(self, items, radius_km: float = None):
+        self._by_category = defaultdict(list)
+        self._text = {}
+        for item in items:
+            self._by_category[item.category].append(item)
+            self._text[item.id] = keyword_text(item.title, item.description)
+        self._candidates = {}
+        self._taken = set()
+        self.radius_km = radius_km
+
+    def _candidate_list(self, category: str, keyword: str) -> _Candidates:
+        key = (category, keyword.lower())
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            needle = key[1]
+            candidates = _Candidates([
+                item for item in self._by_category.get(category, ())
+                if needle in self._text[item.id]
+            ])
+            self._candidates[key] = candidates
+        return candidates
+
+    def take(self, category: str, keyword: str, quantity: int, location=None):
+        """Claim the first untaken item of the category matching keyword and quantity"""
+        candidates = self._candidate_list(category, keyword)
+        items = candidates.items
+
+        # Skip items other requests already claimed at the head of the list
+        while candidates.head < len(items) and items[candidates.head].id in self._taken:
+            candidates.head += 1
+
+        if location is not None and self.radius_km:
+            positions = candidates.near(location, self.radius_km)
+        else:
+            positions = range(candidates.head, len(items))
+
+        for position in positions:
+            item = items[position]
+            if item.id not in self._taken and item.quantity >= quantity:
+                self._taken.add(item.id)
+                return item
+        return None
+
+
+def plan_matches(requests, items, radius_km: float = None):
+    """Pair open requests with available items without touching the database.
+
+    `requests` need id, category, quantity, urgency and requested_item attributes and
+    should already be in priority order; `items` need id, category, quantity, title and
+    description and should be ordered by preference (earliest expiry first). Rows
+    may carry latitude and longitude; with radius_km, a request with coordinates
+    is only paired with items within that distance.
+    Returns a list of (request, item) pairs.
+    """
+    index = CandidateIndex(items, radius_km)
+    pairs = []
+    for req in requests:
+        item = index.take(req.category, req.requested_item or "", req.quantity, location_of(req))
+        if item is not None:
+            pairs.append((req, item))
+    return pairs
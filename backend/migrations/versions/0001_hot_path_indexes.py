@@ -0,0 +1,70 @@
+"""hot path indexes for food item and request filters
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _partial(predicate: str) -> dict:
+    return {
+        "postgresql_where": sa.text(predicate),
+        "sqlite_where": sa.text(predicate),
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_food_items_available_category_expiry", "food_items", ["category", "expiry"],
+        **_partial("status = 'available'"),
+    )
+    op.create_index(
+        "ix_food_items_provider_status_expiry", "food_items", ["provider_id", "status", "expiry"],
+    )
+    op.create_index(
+        "ix_food_items_active_expiry", "food_items", ["expiry"],
+        **_partial("status IN ('available', 'matched')"),
+    )
+    op.create_index(
+        "ix_requests_open_category", "requests", ["category", "created_at"],
+        **_partial("status = 'open'"),
+    )
+    op.create_index("ix_requests_receiver_created", "requests", ["receiver_id", "created_at"])
+    op.create_index("ix_requests_matched_item_id", "requests", ["matched_item_id"])
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_food_items_title_trgm", "food_items", ["title"],
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"},
+        )
+        op.create_index(
+            "ix_food_items_description_trgm", "food_items", ["description"],
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_food_items_description_trgm", table_name="food_items")
+        op.drop_index("ix_food_items_title_trgm", table_name="food_items")
+    op.drop_index("ix_requests_matched_item_id", table_name="requests")
+    op.drop_index("ix_requests_receiver_created", table_name="requests")
+    op.drop_index("ix_requests_open_category", table_name="requests")
+    op.drop_index("ix_food_items_active_expiry", table_name="food_items")
+    op.drop_index("ix_food_items_provider_status_expiry", table_name="food_items")
+    op.drop_index("ix_food_items_available_category_expiry", table_name="food_items")
@@ -0,0 +1,30 @@
+"""keyset pagination indexes for /all-requests
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_requests_created_id", "requests", ["created_at", "id"])
+    op.create_index("ix_requests_status_created_id", "requests", ["status", "created_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_requests_status_created_id", table_name="requests")
+    op.drop_index("ix_requests_created_id", table_name="requests")
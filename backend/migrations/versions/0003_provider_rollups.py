@@ -0,0 +1,51 @@
+"""provider analytics rollup tables
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _counter(name: str) -> sa.Column:
+    return sa.Column(name, sa.Integer(), nullable=False, server_default="0")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "provider_daily_rollups",
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("category", sa.String(50), primary_key=True),
+        _counter("donated_count"),
+        _counter("donated_quantity"),
+        _counter("matched_count"),
+        _counter("fulfilled_count"),
+        _counter("fulfilled_quantity"),
+        _counter("expired_count"),
+        _counter("expired_quantity"),
+    )
+    op.create_table(
+        "provider_item_rollups",
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("title", sa.String(100), primary_key=True),
+        _counter("donated_count"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("provider_item_rollups")
+    op.drop_table("provider_daily_rollups")
@@ -0,0 +1,51 @@
+"""csv food item imports and their error rows
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "food_item_imports",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("provider_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("filename", sa.String(255)),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("rows_processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rows_imported", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rows_failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime()),
+    )
+    op.create_index("ix_food_item_imports_provider_id", "food_item_imports", ["provider_id"])
+    op.create_table(
+        "food_item_import_errors",
+        sa.Column("import_id", sa.Integer(),
+                  sa.ForeignKey("food_item_imports.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("line", sa.Integer(), primary_key=True),
+        sa.Column("errors", sa.JSON(), nullable=False),
+        sa.Column("raw", sa.JSON()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("food_item_import_errors")
+    op.drop_index("ix_food_item_imports_provider_id", table_name="food_item_imports")
+    op.drop_table("food_item_imports")
@@ -0,0 +1,49 @@
+"""coordinates on users and food items, geocode cache
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("users", sa.Column("longitude", sa.Float(), nullable=True))
+    op.add_column("food_items", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("food_items", sa.Column("longitude", sa.Float(), nullable=True))
+    op.create_index(
+        "ix_food_items_available_location", "food_items", ["latitude", "longitude"],
+        postgresql_where=sa.text("status = 'available'"),
+        sqlite_where=sa.text("status = 'available'"),
+    )
+    op.create_table(
+        "geocode_cache",
+        sa.Column("query", sa.Text(), primary_key=True),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("source", sa.String(20), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("geocode_cache")
+    op.drop_index("ix_food_items_available_location", table_name="food_items")
+    op.drop_column("food_items", "longitude")
+    op.drop_column("food_items", "latitude")
+    op.drop_column("users", "longitude")
+    op.drop_column("users", "latitude")
@@ -0,0 +1,33 @@
+"""fulfilment of single allocations
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 20:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("allocations", sa.Column("fulfilled_at", sa.DateTime(), nullable=True))
+    # Allocations of requests fulfilled so far were handed over with them
+    op.execute(
+        "UPDATE allocations SET fulfilled_at = CURRENT_TIMESTAMP "
+        "WHERE request_id IN (SELECT id FROM requests WHERE status = 'fulfilled')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("allocations", "fulfilled_at")
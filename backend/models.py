@@ -17,6 +17,9 @@ class FoodCategory(str, Enum):
     prepared_foods = "Prepared Foods"
     others = "Others"              
 
+InventoryCondition = Literal["expired", "expiring_soon", "fresh", "low_quantity"]
+InventorySort = Literal["condition", "quantity", "title"]
+
 # -------------------- User --------------------
 
 class UserCreate(BaseModel):
@@ -40,6 +43,19 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: str
 
+class Principal(BaseModel):
+    """The authenticated user as seen by route handlers, detached from any session"""
+    id: int
+    email: str
+    role: str
+    location: str
+    # Expiry of the token it was authenticated with, in seconds since the epoch
+    expires_at: Optional[float] = None
+
+    model_config = {
+        "frozen": True
+    }
+
 # -------------------- Food Item --------------------
 
 class FoodItemCreate(BaseModel):
@@ -0,0 +1,140 @@
+# Status-change events for the /events stream (server-sent events).
+# Writers queue events on their session and pubsub delivers them, once the
+# transaction commits, to every worker process, which hands them to the open
+# streams of the user they belong to. Streams are in-memory queues only, so an
+# idle stream costs no database connection.
+import asyncio
+import time
+from collections import defaultdict
+from typing import Optional
+import orjson
+import pubsub
+from config.settings import settings
+
+CHANNEL = "status_events"
+
+PING = b": ping\n\n"
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+
+def notify_status(db, user_id: int, kind: str, row_id: int, status: str, **fields):
+    """Queue a status change of one of the user's requests or food items; sent when db commits.
+
+    kind is "request" or "food_item", the SSE event name; fields are added to its data.
+    """
+    pubsub.publish(db, CHANNEL, {"user_id": user_id, "type": kind, "id": row_id, "status": status, **fields})
+
+
+def _sse(event_data: dict) -> bytes:
+    data = {key: value for key, value in event_data.items() if key not in ("user_id", "type")}
+    return b"event: " + event_data["type"].encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class EventBroker:
+    """The open event streams of this process.
+
+    Every stream is a bounded queue of SSE messages. A stream that falls
+    EVENT_STREAM_QUEUE_SIZE messages behind, or that was open while the
+    listener reconnected, gets a single resync event instead, after which the
+    client should refetch its listing. One heartbeat task pings every stream,
+    so idle streams need no timer of their own.
+    """
+
+    def __init__(self):
+        self._streams = defaultdict(set)
+        self._loop = None
+        self._tasks = []
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=settings.EVENT_STREAM_QUEUE_SIZE)
+        self._streams[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        streams = self._streams.get(user_id)
+        if streams is not None:
+            streams.discard(queue)
+            if not streams:
+                del self._streams[user_id]
+
+    @property
+    def stream_count(self) -> int:
+        return sum(len(streams) for streams in self._streams.values())
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, message: bytes):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            message = RESYNC
+        queue.put_nowait(message)
+
+    def publish(self, events):
+        """Hand events to the streams of their users; call on the event loop"""
+        for event_data in events:
+            streams = self._streams.get(event_data["user_id"])
+            if streams:
+                message = _sse(event_data)
+                for queue in streams:
+                    self._offer(queue, message)
+
+    def publish_threadsafe(self, events):
+        if self._loop is not None and self._streams:
+            self._loop.call_soon_threadsafe(self.publish, events)
+
+    def _broadcast(self, message: bytes):
+        for streams in self._streams.values():
+            for queue in streams:
+                self._offer(queue, message)
+
+    def resync(self):
+        """Tell every stream that events may have been missed; call on the event loop"""
+        self._broadcast(RESYNC)
+
+    async def stream(self, user_id: int, expires_at: Optional[float] = None):
+        """SSE messages for one user until the client disconnects.
+
+        With expires_at (seconds since the epoch, the expiry of the token the
+        stream was opened with) the stream ends at the first heartbeat after
+        it, so the client has to reconnect, and authenticate, again.
+        """
+        queue = self.subscribe(user_id)
+        try:
+            yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n".encode()
+            while True:
+                message = await queue.get()
+                if message is PING and expires_at is not None and time.time() >= expires_at:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(user_id, queue)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._heartbeat())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.EVENT_STREAM_HEARTBEAT_SECONDS)
+            self._broadcast(PING)
+
+
+broker = EventBroker()
+
+
+@pubsub.subscribe(CHANNEL)
+def _deliver(events):
+    broker.publish_threadsafe(events)
+
+
+@pubsub.on_reconnect
+def _resync():
+    # Whatever was sent while the listener was away is lost
+    broker.resync()
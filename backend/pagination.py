@@ -0,0 +1,39 @@
+# Opaque keyset pagination cursors shared by the listing endpoints
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    """Pack the sort key of the last row of a page into an opaque token"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Unpack a token from encode_cursor, converting each value to the given type.
+
+    Raises ValueError for tokens that were not produced by encode_cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("Malformed cursor")
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for value, kind in zip(payload, types)
+        )
+    except (TypeError, ValueError, json.JSONDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def decode_cursor_param(cursor, *types):
+    """decode_cursor for a query parameter: None when absent, HTTP 400 when invalid"""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor, *types)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
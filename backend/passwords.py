@@ -0,0 +1,41 @@
+# Password hashing, kept off the event loop
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from config.settings import settings
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def verify_password(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+def get_password_hash(password):
+    return pwd_context.hash(password)
+
+
+class HashingPool:
+    """Bounded worker pool for bcrypt work.
+
+    bcrypt releases the GIL while it hashes, so worker threads run on separate
+    cores and `concurrency` caps how many hashes run at once; further calls
+    queue on the pool instead of blocking the event loop.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="password-hash")
+
+    async def verify(self, plain_password, hashed_password) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, verify_password, plain_password, hashed_password)
+
+    async def hash(self, password) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, get_password_hash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+hashing_pool = HashingPool(settings.PASSWORD_HASH_CONCURRENCY)
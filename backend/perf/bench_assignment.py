@@ -0,0 +1,80 @@
+"""Benchmark the global assignment solver against the greedy matcher on the same rows.
+
+Run from the backend directory:
+    python perf/bench_assignment.py
+"""
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from assignment import plan_allocations
+from matching import plan_matches, urgency_rank
+
+CATEGORIES = ["Produce", "Dairy", "Meat", "Baked Goods", "Canned Goods", "Dry Goods"]
+KEYWORDS = ["banana", "apple", "milk", "cheese", "bread", "beans", "rice", "chicken", "pasta", "soup"]
+
+RequestRow = namedtuple("RequestRow", "id category quantity urgency requested_item needed_by latitude longitude")
+ItemRow = namedtuple("ItemRow", "id category quantity title description expiry latitude longitude")
+RADIUS_KM = 10.0
+
+
+def metro_point(rng):
+    """A point in a ~60 km square around a city centre"""
+    return 40.0 + rng.uniform(-0.27, 0.27), -75.0 + rng.uniform(-0.35, 0.35)
+
+
+def make_requests(count, rng, now):
+    # Requests come from a few hundred receivers, each at one location
+    receivers = [metro_point(rng) for _ in range(max(1, count // 100))]
+    rows = [
+        RequestRow(i, rng.choice(CATEGORIES), rng.randint(1, 20),
+                   rng.choice(["low", "medium", "high"]), rng.choice(KEYWORDS),
+                   now + timedelta(days=rng.randint(0, 10)) if rng.random() < 0.5 else None,
+                   *rng.choice(receivers))
+        for i in range(count)
+    ]
+    rows.sort(key=lambda r: (urgency_rank(r.urgency), r.id))
+    return rows
+
+
+def make_items(count, rng, now):
+    rows = [
+        ItemRow(i, rng.choice(CATEGORIES), rng.randint(1, 30),
+                f"{rng.choice(KEYWORDS).title()} box {i}", f"Fresh {rng.choice(KEYWORDS)}",
+                now + timedelta(hours=rng.randint(1, 300)), *metro_point(rng))
+        for i in range(count)
+    ]
+    rows.sort(key=lambda r: (r.expiry, r.id))
+    return rows
+
+
+def run(count, radius_km, rng):
+    now = datetime.utcnow()
+    requests = make_requests(count, rng, now)
+    items = make_items(count, rng, now)
+
+    started = time.perf_counter()
+    pairs = plan_matches(requests, items, radius_km)
+    greedy_seconds = time.perf_counter() - started
+    greedy_units = sum(req.quantity for req, _ in pairs)
+
+    started = time.perf_counter()
+    allocations = plan_allocations(requests, items, now, radius_km)
+    assignment_seconds = time.perf_counter() - started
+    assignment_units = sum(quantity for _, _, quantity in allocations)
+
+    return greedy_seconds, greedy_units, assignment_seconds, assignment_units
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    print(f"{'rows':>8} {'radius':>8} {'greedy s':>10} {'greedy units':>14} {'assign s':>10} {'assign units':>14}")
+    for count in (1_000, 10_000, 50_000):
+        for radius_km in (None, RADIUS_KM):
+            greedy_seconds, greedy_units, assignment_seconds, assignment_units = run(count, radius_km, rng)
+            print(f"{count:>8} {radius_km or '-':>8} {greedy_seconds:>10.3f} {greedy_units:>14} "
+                  f"{assignment_seconds:>10.3f} {assignment_units:>14}")
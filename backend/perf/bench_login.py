@@ -0,0 +1,61 @@
+"""Load benchmark for the login password check at different pool sizes.
+
+Fires a burst of concurrent logins' worth of bcrypt verifications through
+passwords.HashingPool, the path /token uses, and reports logins per second
+while the event loop stays free. Throughput should grow with the concurrency
+limit up to the number of cores.
+
+Run from the backend directory:
+    python perf/bench_login.py [--logins 64]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from passwords import HashingPool, get_password_hash
+
+
+async def run(concurrency: int, logins: int, hashed: str) -> float:
+    pool = HashingPool(concurrency)
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(pool.verify("correct horse", hashed) for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+    assert all(results)
+    return logins / elapsed
+
+
+async def loop_lag(duration: float) -> float:
+    """Worst delay of a 10ms ticker while logins are running"""
+    worst = 0.0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        before = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - before - 0.01)
+    return worst
+
+
+async def main(logins: int):
+    hashed = get_password_hash("correct horse")
+    cores = os.cpu_count() or 1
+    levels = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+
+    print(f"{'workers':>8} {'logins/s':>10} {'max loop lag ms':>16}")
+    for concurrency in levels:
+        lag_task = asyncio.create_task(loop_lag(1.0))
+        rate = await run(concurrency, logins, hashed)
+        lag = await lag_task
+        print(f"{concurrency:>8} {rate:>10.1f} {lag * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    asyncio.run(main(parser.parse_args().logins))
@@ -0,0 +1,54 @@
+"""Benchmark the in-memory matching engine against growing request and item counts.
+
+Run from the backend directory:
+    python perf/bench_matching.py
+"""
+import random
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from matching import plan_matches, urgency_rank
+
+CATEGORIES = ["Produce", "Dairy", "Meat", "Baked Goods", "Canned Goods", "Dry Goods"]
+KEYWORDS = ["banana", "apple", "milk", "cheese", "bread", "beans", "rice", "chicken", "pasta", "soup"]
+
+RequestRow = namedtuple("RequestRow", "id category quantity urgency requested_item")
+ItemRow = namedtuple("ItemRow", "id category quantity title description")
+
+
+def make_requests(count, rng):
+    rows = [
+        RequestRow(i, rng.choice(CATEGORIES), rng.randint(1, 20),
+                   rng.choice(["low", "medium", "high"]), rng.choice(KEYWORDS))
+        for i in range(count)
+    ]
+    rows.sort(key=lambda r: (urgency_rank(r.urgency), r.id))
+    return rows
+
+
+def make_items(count, rng):
+    return [
+        ItemRow(i, rng.choice(CATEGORIES), rng.randint(1, 30),
+                f"{rng.choice(KEYWORDS).title()} box {i}", f"Fresh {rng.choice(KEYWORDS)}")
+        for i in range(count)
+    ]
+
+
+def run(request_count, item_count, rng):
+    requests = make_requests(request_count, rng)
+    items = make_items(item_count, rng)
+    started = time.perf_counter()
+    pairs = plan_matches(requests, items)
+    return time.perf_counter() - started, len(pairs)
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    print(f"{'requests':>10} {'items':>10} {'matches':>10} {'seconds':>10}")
+    for request_count in (1_000, 5_000, 20_000, 50_000):
+        for item_count in (1_000, 10_000, 50_000):
+            elapsed, matched = run(request_count, item_count, rng)
+            print(f"{request_count:>10} {item_count:>10} {matched:>10} {elapsed:>10.3f}")
@@ -0,0 +1,73 @@
+"""Benchmark the semantic matcher: vectorizing items and requests, and batched scoring.
+
+Run from the backend directory:
+    python perf/bench_semantic.py [--items 50000] [--requests 10000]
+"""
+import argparse
+import random
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from embeddings import HashingVectorizer, plan_semantic_matches, similarity_batches, idf_weighted
+import embeddings
+
+CATEGORIES = ["Produce", "Dairy", "Meat", "Baked Goods", "Canned Goods", "Dry Goods"]
+KEYWORDS = ["banana", "apple", "milk", "cheese", "bread", "beans", "rice", "chicken", "pasta", "soup"]
+ADJECTIVES = ["fresh", "organic", "whole", "sliced", "frozen", "canned", "ripe", "day-old"]
+
+RequestRow = namedtuple("RequestRow", "id category quantity urgency requested_item")
+ItemRow = namedtuple("ItemRow", "id category quantity title description")
+
+
+def make_items(count, rng):
+    return [
+        ItemRow(i, rng.choice(CATEGORIES), rng.randint(1, 30),
+                f"{rng.choice(ADJECTIVES).title()} {rng.choice(KEYWORDS)} box {i}",
+                f"{rng.choice(ADJECTIVES)} {rng.choice(KEYWORDS)}, pick up before noon")
+        for i in range(count)
+    ]
+
+
+def make_requests(count, rng):
+    return [
+        RequestRow(i, rng.choice(CATEGORIES), rng.randint(1, 20), "high", rng.choice(KEYWORDS + ["chikken", "aples"]))
+        for i in range(count)
+    ]
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main(item_count, request_count):
+    rng = random.Random(42)
+    vectorizer = embeddings._vectorizer = HashingVectorizer()
+    items = make_items(item_count, rng)
+    requests = make_requests(request_count, rng)
+
+    seconds, item_vectors = timed(vectorizer.encode, [embeddings.item_text(item) for item in items])
+    print(f"vectorize {item_count} items (once, at insert): {seconds:.2f}s, "
+          f"{item_vectors.nbytes / 2**20:.0f} MiB float32")
+    seconds, request_vectors = timed(vectorizer.encode, [embeddings.request_text(req) for req in requests])
+    print(f"vectorize {request_count} requests: {seconds:.2f}s")
+
+    seconds, _ = timed(lambda: [
+        block.max() for _, block in similarity_batches(*idf_weighted(request_vectors, item_vectors))
+    ])
+    print(f"score {request_count} x {item_count} across categories, in batches: {seconds:.2f}s")
+
+    seconds, triples = timed(plan_semantic_matches, requests, items, item_vectors, 0.3)
+    print(f"plan_semantic_matches: {seconds:.2f}s, {len(triples)} matches")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+    main(args.items, args.requests)
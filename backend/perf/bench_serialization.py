@@ -0,0 +1,127 @@
+"""Benchmark per-item response serialization: FastAPI's default paths against serializers.py.
+
+Run from the backend directory:
+    python perf/bench_serialization.py [--items 10000]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parent.parent))
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from models import FoodItemOut, RequestOut, ShelterRequestOut
+from serializers import food_item_out, request_out, shelter_request_out
+
+
+class Row:
+    """Stands in for a loaded ORM object: plain attribute access"""
+
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def make_food_items(count):
+    now = datetime.utcnow()
+    return [Row(
+        id=i, title=f"Banana box {i}", description="Ripe bananas, pick up before noon",
+        category="Produce", quantity=1 + i % 25, expiry=now + timedelta(hours=i % 96),
+        available_from=now, available_until=now + timedelta(days=1),
+        pickup_location="12 Market Street", status="available", created_at=now
+    ) for i in range(count)]
+
+
+def make_requests(count):
+    now = datetime.utcnow()
+    return [Row(
+        id=i, title=f"Request {i}", requested_item="banana", category="Produce",
+        quantity=1 + i % 20, urgency="high", needed_by=None, is_recurring=False,
+        notes="Evening pickup", status="open", created_at=now
+    ) for i in range(count)]
+
+
+def make_shelter_rows(count):
+    now = datetime.utcnow()
+    return [{
+        "id": i, "title": f"Request {i}", "created_at": now, "urgency": "High",
+        "status": "Open", "notes": None,
+        "items": [{"name": "banana", "category": "Produce", "quantity": 3, "unit": "units"}]
+    } for i in range(count)]
+
+
+def per_item_us(fn, items, repeat=3):
+    best = min(_timed(fn, items) for _ in range(repeat))
+    return best / len(items) * 1e6
+
+
+def _timed(fn, items):
+    started = time.perf_counter()
+    fn(items)
+    return time.perf_counter() - started
+
+
+def validated(model):
+    """FastAPI with a response_model: from_attributes validation, then serialization"""
+    adapter = TypeAdapter(model)
+
+    def python_mode(objs):
+        # Custom response class: validate, serialize to a dict, json.dumps it
+        for obj in objs:
+            value = adapter.validate_python(obj, from_attributes=True)
+            json.dumps(adapter.dump_python(value, mode="json", by_alias=True)).encode()
+
+    def json_mode(objs):
+        # Default response class: validate, dump straight to JSON bytes
+        for obj in objs:
+            adapter.dump_json(adapter.validate_python(obj, from_attributes=True), by_alias=True)
+
+    return python_mode, json_mode
+
+
+def precompiled(serializer):
+    def run(objs):
+        for obj in objs:
+            orjson.dumps(serializer.row(obj))
+    return run
+
+
+def main(count):
+    cases = []
+    for name, model, serializer, objs in (
+        ("FoodItemOut", FoodItemOut, food_item_out, make_food_items(count)),
+        ("RequestOut", RequestOut, request_out, make_requests(count)),
+    ):
+        python_mode, json_mode = validated(model)
+        cases.append((name, "validate + json.dumps", python_mode, objs))
+        cases.append((name, "validate + dump_json", json_mode, objs))
+        cases.append((name, "precompiled + orjson", precompiled(serializer), objs))
+
+    # ShelterRequestOut is derived from a request row: validated from the built dict by default,
+    # built straight from the row by the precompiled serializer
+    shelter_rows = make_shelter_rows(count)
+    shelter = TypeAdapter(ShelterRequestOut)
+    cases.append(("ShelterRequestOut", "validate + dump_json",
+                  lambda rows: [shelter.dump_json(shelter.validate_python(row)) for row in rows], shelter_rows))
+    cases.append(("ShelterRequestOut", "precompiled + orjson", precompiled(shelter_request_out), make_requests(count)))
+
+    shelter_list = TypeAdapter(List[ShelterRequestOut])
+    cases.append(("ShelterRequestOut list", "validate + dump_json",
+                  lambda rows: shelter_list.dump_json(shelter_list.validate_python(rows)), shelter_rows))
+    cases.append(("ShelterRequestOut list", "jsonable_encoder + json.dumps",
+                  lambda rows: json.dumps(jsonable_encoder(rows)).encode(), shelter_rows))
+    cases.append(("ShelterRequestOut list", "orjson", lambda rows: orjson.dumps(rows), shelter_rows))
+
+    print(f"{'model':<24} {'path':<32} {'us/item':>10}")
+    for name, path, fn, objs in cases:
+        print(f"{name:<24} {path:<32} {per_item_us(fn, objs):>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    main(parser.parse_args().items)
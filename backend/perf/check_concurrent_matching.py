@@ -0,0 +1,139 @@
+"""Check that parallel matcher workers never allocate an item twice, and measure their throughput.
+
+Workers are separate processes, so the synthetic rows are committed; they are
+tagged and deleted again afterwards. Every open request in the database is
+matched, so run it against a scratch (migrated) Postgres database.
+
+Run from the backend directory:
+    python perf/check_concurrent_matching.py [--requests 20000] [--workers 1 2 4 8]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from sqlalchemy import text
+from config.database import engine
+from matcher import run_parallel
+
+TAG = "concurrency-check-"
+CATEGORIES = ["Produce", "Dairy", "Meat", "Baked Goods", "Canned Goods", "Dry Goods"]
+KEYWORDS = ["banana", "apple", "milk", "cheese", "bread", "beans", "rice", "chicken", "pasta", "soup"]
+
+TAGGED_USERS = f"SELECT id FROM users WHERE email LIKE '{TAG}%'"
+TAGGED_REQUESTS = f"SELECT id FROM requests WHERE receiver_id IN ({TAGGED_USERS})"
+TAGGED_ITEMS = f"SELECT id FROM food_items WHERE provider_id IN ({TAGGED_USERS})"
+
+
+def cleanup(conn):
+    conn.execute(text(f"DELETE FROM allocations WHERE request_id IN ({TAGGED_REQUESTS})"))
+    conn.execute(text(f"DELETE FROM requests WHERE id IN ({TAGGED_REQUESTS})"))
+    conn.execute(text(f"DELETE FROM food_item_embeddings WHERE food_item_id IN ({TAGGED_ITEMS})"))
+    conn.execute(text(f"DELETE FROM food_items WHERE id IN ({TAGGED_ITEMS})"))
+    for table in ("provider_daily_rollups", "provider_item_rollups"):
+        conn.execute(text(f"DELETE FROM {table} WHERE provider_id IN ({TAGGED_USERS})"))
+    conn.execute(text(f"DELETE FROM collection_versions WHERE owner_id IN ({TAGGED_USERS})"))
+    conn.execute(text(f"DELETE FROM users WHERE id IN ({TAGGED_USERS})"))
+
+
+def seed(conn, requests: int):
+    """Open requests and fewer available items, so workers compete for the same items"""
+    users = max(requests // 50, 2)
+    conn.execute(text("""
+        INSERT INTO users (name, email, password_hash, role, location, type)
+        SELECT 'Concurrency user ' || g, :tag || g || '@example.com', 'x',
+               CASE WHEN g % 2 = 0 THEN 'provider' ELSE 'receiver' END, 'Somewhere', 'store'
+        FROM generate_series(1, :users) AS g
+    """), {"users": users, "tag": TAG})
+    provider_ids = conn.execute(text(f"SELECT array_agg(id) FROM ({TAGGED_USERS} AND role = 'provider') AS p")).scalar()
+    receiver_ids = conn.execute(text(f"SELECT array_agg(id) FROM ({TAGGED_USERS} AND role = 'receiver') AS r")).scalar()
+
+    conn.execute(text("""
+        INSERT INTO food_items (provider_id, title, description, category, quantity, expiry,
+                                available_from, available_until, pickup_location, status)
+        SELECT l.providers[1 + g % cardinality(l.providers)],
+               initcap(l.keywords[1 + g % cardinality(l.keywords)]) || ' box ' || g, 'Synthetic item',
+               l.categories[1 + (g / 7) % cardinality(l.categories)], 5 + g % 20,
+               now() + (1 + g % 72) * interval '1 hour',
+               now() - interval '1 day', now() + interval '1 day', 'Somewhere', 'available'
+        FROM generate_series(1, :items) AS g,
+             (SELECT CAST(:providers AS int[]) AS providers, CAST(:keywords AS text[]) AS keywords,
+                     CAST(:categories AS text[]) AS categories) AS l
+    """), {"items": requests * 3 // 5, "providers": provider_ids,
+           "keywords": KEYWORDS, "categories": CATEGORIES})
+    conn.execute(text("""
+        INSERT INTO requests (receiver_id, title, requested_item, category, quantity, urgency,
+                              is_recurring, status)
+        SELECT l.receivers[1 + g % cardinality(l.receivers)],
+               'Request ' || g, l.keywords[1 + g % cardinality(l.keywords)],
+               l.categories[1 + (g / 11) % cardinality(l.categories)], 1 + g % 15,
+               (ARRAY['low', 'medium', 'high'])[1 + g % 3], false, 'open'
+        FROM generate_series(1, :requests) AS g,
+             (SELECT CAST(:receivers AS int[]) AS receivers, CAST(:keywords AS text[]) AS keywords,
+                     CAST(:categories AS text[]) AS categories) AS l
+    """), {"requests": requests, "receivers": receiver_ids,
+           "keywords": KEYWORDS, "categories": CATEGORIES})
+    conn.execute(text("ANALYZE users, food_items, requests, allocations"))
+
+
+def violations(conn) -> dict:
+    """Counts of double allocations among the tagged rows; all zero when the workers kept apart"""
+    return {
+        "items allocated more than once": conn.execute(text(f"""
+            SELECT count(*) FROM (SELECT food_item_id FROM allocations
+                                  WHERE food_item_id IN ({TAGGED_ITEMS})
+                                  GROUP BY food_item_id HAVING count(*) > 1) AS twice
+        """)).scalar(),
+        "items allocated beyond their quantity": conn.execute(text(f"""
+            SELECT count(*) FROM food_items f
+            JOIN (SELECT food_item_id, sum(quantity) AS allocated FROM allocations
+                  GROUP BY food_item_id) a ON a.food_item_id = f.id
+            WHERE f.id IN ({TAGGED_ITEMS}) AND a.allocated > f.quantity
+        """)).scalar(),
+        "items matched to several requests": conn.execute(text(f"""
+            SELECT count(*) FROM (SELECT matched_item_id FROM requests
+                                  WHERE id IN ({TAGGED_REQUESTS}) AND matched_item_id IS NOT NULL
+                                  GROUP BY matched_item_id HAVING count(*) > 1) AS shared
+        """)).scalar(),
+        "matched requests without one allocation": conn.execute(text(f"""
+            SELECT count(*) FROM requests r
+            WHERE r.id IN ({TAGGED_REQUESTS}) AND r.status = 'matched'
+              AND (SELECT count(*) FROM allocations a WHERE a.request_id = r.id) != 1
+        """)).scalar(),
+    }
+
+
+def run(requests: int, workers: int, partitioned: bool):
+    with engine.begin() as conn:
+        cleanup(conn)
+        seed(conn, requests)
+    try:
+        results = run_parallel(workers, partitioned=partitioned)
+        with engine.begin() as conn:
+            found = violations(conn)
+    finally:
+        with engine.begin() as conn:
+            cleanup(conn)
+    matches = sum(count for count, _ in results)
+    seconds = max(elapsed for _, elapsed in results)
+    return matches, seconds, found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'mode':>12} {'workers':>8} {'matches':>8} {'seconds':>8} {'matches/s':>10}")
+    for partitioned in (False, True):
+        for workers in args.workers:
+            matches, seconds, found = run(args.requests, workers, partitioned)
+            mode = "partitioned" if partitioned else "contended"
+            print(f"{mode:>12} {workers:>8} {matches:>8} {seconds:>8.2f} {matches / seconds:>10.0f}")
+            for check, count in found.items():
+                if count:
+                    failed = True
+                    print(f"    FAIL: {count} {check}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,156 @@
+"""Fail when a crud query plan regresses to a sequential scan on a large dataset.
+
+Seeds a large synthetic dataset inside one transaction on the configured (migrated)
+Postgres database, runs the crud functions while capturing every statement they send,
+EXPLAINs each captured statement and rolls everything back afterwards.
+
+Run from the backend directory:
+    python perf/check_query_plans.py [--rows 200000]
+"""
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from config.database import engine
+import crud
+
+WATCHED_TABLES = {"users", "food_items", "requests", "feedback"}
+CATEGORIES = ["Produce", "Dairy", "Meat", "Baked Goods", "Canned Goods",
+              "Dry Goods", "Beverages", "Frozen Foods", "Prepared Foods", "Others"]
+
+
+def seed(conn, rows: int):
+    """Insert rows food items and requests, mostly already fulfilled like production data."""
+    users = max(rows // 10, 10)
+    conn.execute(text("""
+        INSERT INTO users (name, email, password_hash, role, location, type)
+        SELECT 'Plan user ' || g, 'plan-check-' || g || '@example.com', 'x',
+               CASE WHEN g % 2 = 0 THEN 'provider' ELSE 'receiver' END, 'Somewhere', 'store'
+        FROM generate_series(1, :users) AS g
+    """), {"users": users})
+    provider_ids = conn.execute(text(
+        "SELECT array_agg(id) FROM users WHERE email LIKE 'plan-check-%' AND role = 'provider'"
+    )).scalar()
+    receiver_ids = conn.execute(text(
+        "SELECT array_agg(id) FROM users WHERE email LIKE 'plan-check-%' AND role = 'receiver'"
+    )).scalar()
+
+    # ~2% available, ~1% matched, the rest long fulfilled
+    conn.execute(text("""
+        INSERT INTO food_items (provider_id, title, description, category, quantity, expiry,
+                                available_from, available_until, pickup_location, latitude, longitude,
+                                status, created_at)
+        SELECT l.providers[1 + g % cardinality(l.providers)],
+               'Item ' || g, 'Synthetic item ' || g, l.categories[1 + g % cardinality(l.categories)],
+               1 + g % 25,
+               now() + ((g % 240) - 120) * interval '1 hour',
+               now() - interval '1 day', now() + interval '1 day', 'Somewhere',
+               40 + (g % 1009) / 1000.0, -75 + (g % 997) / 1000.0,
+               CASE WHEN g % 50 = 0 THEN 'available' WHEN g % 100 = 1 THEN 'matched' ELSE 'fulfilled' END,
+               now() - (g % 365) * interval '1 day'
+        FROM generate_series(1, :rows) AS g,
+             (SELECT CAST(:providers AS integer[]) AS providers, CAST(:categories AS text[]) AS categories) AS l
+    """), {"rows": rows, "providers": provider_ids, "categories": CATEGORIES})
+    conn.execute(text("""
+        INSERT INTO requests (receiver_id, title, requested_item, category, quantity, urgency,
+                              is_recurring, status, created_at)
+        SELECT l.receivers[1 + g % cardinality(l.receivers)],
+               'Request ' || g, 'Item ' || (g % 500), l.categories[1 + g % cardinality(l.categories)],
+               1 + g % 20, (ARRAY['low', 'medium', 'high'])[1 + g % 3], false,
+               CASE WHEN g % 50 = 0 THEN 'open' WHEN g % 100 = 1 THEN 'matched' ELSE 'fulfilled' END,
+               now() - (g % 365) * interval '1 day'
+        FROM generate_series(1, :rows) AS g,
+             (SELECT CAST(:receivers AS integer[]) AS receivers, CAST(:categories AS text[]) AS categories) AS l
+    """), {"rows": rows, "receivers": receiver_ids, "categories": CATEGORIES})
+    conn.execute(text("ANALYZE users, food_items, requests"))
+    return provider_ids[0], receiver_ids[0]
+
+
+@contextmanager
+def capture_statements(conn):
+    """Collect (statement, parameters) for every single-row execution on conn."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(conn, "before_cursor_execute", before_cursor_execute)
+
+
+def sequential_scans(plan):
+    """Yield the watched relations a JSON plan reads with a sequential scan."""
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in WATCHED_TABLES:
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from sequential_scans(child)
+
+
+def crud_calls(db, provider_id, receiver_id):
+    now = datetime.utcnow()
+    matched_id = db.execute(text("SELECT id FROM food_items WHERE status = 'matched' LIMIT 1")).scalar()
+    # Keyset of a later page of the open requests listing
+    after = tuple(db.execute(text(
+        "SELECT created_at, id FROM requests WHERE status = 'open' ORDER BY created_at DESC, id DESC OFFSET 50 LIMIT 1"
+    )).one())
+    return [
+        ("get_user_by_email", lambda: crud.get_user_by_email(db, "plan-check-2@example.com")),
+        ("get_available_food_items", lambda: crud.get_available_food_items(db, now)),
+        ("get_nearby_available_food", lambda: crud.get_nearby_available_food(db, (40.5, -74.5), 5)),
+        ("get_active_inventory", lambda: crud.get_active_inventory(db, provider_id)),
+        ("get_active_inventory page", lambda: crud.get_active_inventory(db, provider_id, ("expiring_soon",), limit=50)),
+        ("get_requests_for_receiver", lambda: crud.get_requests_for_receiver(db, receiver_id)),
+        ("get_requests_page", lambda: crud.get_requests_page(db, ("open", "matched"), None, 50)),
+        ("get_requests_page after", lambda: crud.get_requests_page(db, ("open",), after, 50)),
+        ("assign_requests_to_food_items", lambda: crud.assign_requests_to_food_items(db, now)),
+        ("match_requests_to_food_items", lambda: crud.match_requests_to_food_items(db)),
+        ("mark_food_as_fulfilled", lambda: crud.mark_food_as_fulfilled(matched_id, db)),
+        ("mark_expired_food_items_as_fulfilled", lambda: crud.mark_expired_food_items_as_fulfilled(db)),
+    ]
+
+
+def main(rows: int) -> int:
+    failures = 0
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            provider_id, receiver_id = seed(conn, rows)
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            raw = conn.connection.dbapi_connection
+
+            for name, call in crud_calls(db, provider_id, receiver_id):
+                with capture_statements(conn) as captured:
+                    call()
+                for statement, parameters in captured:
+                    cursor = raw.cursor()
+                    cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+                    plan = cursor.fetchone()[0]
+                    cursor.close()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    scans = sorted(set(sequential_scans(plan[0]["Plan"])))
+                    status = "SEQ SCAN on " + ", ".join(scans) if scans else "ok"
+                    failures += bool(scans)
+                    print(f"[{status}] {name}: {' '.join(statement.split())[:120]}")
+            db.close()
+        finally:
+            trans.rollback()
+
+    print(f"{failures} statement(s) with sequential scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    sys.exit(main(parser.parse_args().rows))
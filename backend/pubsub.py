@@ -0,0 +1,162 @@
+# Messages between worker processes through Postgres NOTIFY, in step with the
+# transactions that cause them. publish() queues a message on a session; it is
+# sent with pg_notify just before the session commits (Postgres delivers it only
+# if the commit succeeds), handed to the subscribers of this process right after
+# the commit, and to those of every other process by their LISTEN connection.
+import asyncio
+import uuid
+from collections import defaultdict
+import asyncpg
+import orjson
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from config.database import engine
+from config.logging_config import get_logger
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+# Tells this process's own messages apart when LISTEN hands them back
+INSTANCE = uuid.uuid4().hex
+# NOTIFY payloads must stay under 8000 bytes; messages are packed up to this size
+MAX_PAYLOAD_BYTES = 7000
+
+_PENDING = "pubsub_pending"
+_NOTIFY = text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload")
+
+_subscribers = defaultdict(list)
+_reconnect_handlers = []
+
+
+def publish(db, channel: str, message: dict):
+    """Queue message for the subscribers of channel in every process, sent when db commits.
+
+    Identical messages of one transaction are sent once.
+    """
+    pending = db.info.setdefault(_PENDING, {})
+    pending.setdefault(channel, {})[orjson.dumps(message, option=orjson.OPT_SORT_KEYS)] = message
+
+
+def subscribe(channel: str):
+    """Register handler(messages) for channel, called with the messages of each commit.
+
+    Handlers run in the committing thread for this process's own commits and
+    on the event loop for the others', so they must be quick and thread-safe.
+    Register them at import time, before the listener starts.
+    """
+    def register(handler):
+        _subscribers[channel].append(handler)
+        return handler
+    return register
+
+
+def on_reconnect(handler):
+    """Register handler() to run when the listener reconnected, so messages may have been missed"""
+    _reconnect_handlers.append(handler)
+    return handler
+
+
+def _dispatch(channel: str, messages):
+    for handler in _subscribers.get(channel, ()):
+        try:
+            handler(messages)
+        except Exception as exc:
+            logger.error(f"Subscriber {handler.__name__} of {channel} failed: {exc}")
+
+
+def _payloads(encoded_messages):
+    """Pack encoded messages into NOTIFY payloads of at most MAX_PAYLOAD_BYTES"""
+    prefix = b'{"s":"' + INSTANCE.encode() + b'","m":['
+    batch, size = [], len(prefix)
+    for encoded in encoded_messages:
+        if batch and size + len(encoded) + 2 > MAX_PAYLOAD_BYTES:
+            yield (prefix + b",".join(batch) + b"]}").decode()
+            batch, size = [], len(prefix)
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        yield (prefix + b",".join(batch) + b"]}").decode()
+
+
+@event.listens_for(Session, "before_commit")
+def _send_pending(session):
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    # commit() only flushes after this hook, and mapper events may publish while it does
+    session.flush()
+    pending = session.info.get(_PENDING)
+    if not pending:
+        return
+    for channel, messages in sorted(pending.items()):
+        payloads = list(_payloads(messages))
+        for start in range(0, len(payloads), 1000):
+            session.execute(_NOTIFY, {"channel": channel, "payloads": payloads[start:start + 1000]})
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_after_commit(session):
+    pending = session.info.pop(_PENDING, None)
+    for channel, messages in (pending or {}).items():
+        _dispatch(channel, list(messages.values()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+class Listener:
+    """The one LISTEN connection of a process, reconnecting with backoff"""
+
+    def __init__(self):
+        self._task = None
+
+    def start(self):
+        if engine.dialect.name == "postgresql" and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @staticmethod
+    def _on_notification(connection, pid, channel, payload):
+        payload = orjson.loads(payload)
+        if payload["s"] != INSTANCE:
+            _dispatch(channel, payload["m"])
+
+    async def _run(self):
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        delay, connected_before = 1, False
+        while True:
+            try:
+                conn = await asyncpg.connect(dsn)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning(f"Pub/sub listener cannot connect, retrying in {delay}s: {exc}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+
+            delay = 1
+            try:
+                for channel in list(_subscribers):
+                    await conn.add_listener(channel, self._on_notification)
+                if connected_before:
+                    for handler in _reconnect_handlers:
+                        try:
+                            handler()
+                        except Exception as exc:
+                            logger.error(f"Reconnect handler {handler.__name__} failed: {exc}")
+                connected_before = True
+                while True:
+                    await asyncio.sleep(settings.PUBSUB_PING_SECONDS)
+                    await conn.execute("SELECT 1")  # notices a dropped connection
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.warning(f"Pub/sub listener lost its connection: {exc}")
+            finally:
+                conn.terminate()
+
+
+listener = Listener()
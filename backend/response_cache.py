@@ -0,0 +1,52 @@
+# Cached per-provider dashboard responses, dropped in every worker whenever the provider's data changes
+from cache import TTLCache
+from cache_bus import bind_cache
+from config.settings import settings
+
+provider_responses = TTLCache(
+    "provider_responses",
+    maxsize=settings.PROVIDER_CACHE_SIZE,
+    ttl=settings.PROVIDER_CACHE_TTL_SECONDS,
+)
+
+_MISSING = object()
+
+
+def _provider_tag(provider_id: int) -> str:
+    return f"provider:{provider_id}"
+
+
+def cached_provider_response(provider_id: int, key: tuple, build):
+    """Return the cached response for (provider_id, *key), calling build() on a miss.
+
+    key must include the provider's collection version as read by the session
+    build() uses, so a lagging replica cannot refill the entry with data older
+    than what the next, caught-up read will expect.
+    """
+    cache_key = (provider_id, *key)
+    value = provider_responses.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    tags = (_provider_tag(provider_id),)
+    versions = provider_responses.tag_versions(tags)
+    value = build()
+    provider_responses.set(cache_key, value, tags=tags, versions=versions)
+    return value
+
+
+async def async_cached_provider_response(provider_id: int, key: tuple, build):
+    """cached_provider_response for a coroutine function build"""
+    cache_key = (provider_id, *key)
+    value = provider_responses.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    tags = (_provider_tag(provider_id),)
+    versions = provider_responses.tag_versions(tags)
+    value = await build()
+    provider_responses.set(cache_key, value, tags=tags, versions=versions)
+    return value
+
+
+bind_cache(provider_responses, "food_item", lambda event: [_provider_tag(event["owner_id"])])
@@ -0,0 +1,252 @@
+# Provider impact analytics, kept in rollup tables that crud.py updates incrementally
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, delete, case, exists, and_, or_, literal, union_all
+from sqlalchemy.orm import Session
+from config.database import dialect_insert
+from schema import Allocation, FoodItem, Request, ProviderDailyRollup, ProviderItemRollup
+
+DAILY_COUNTERS = (
+    "donated_count", "donated_quantity", "matched_count",
+    "fulfilled_count", "fulfilled_quantity", "expired_count", "expired_quantity",
+)
+
+# Counters bumped when items move to a status: status -> (count column, quantity column)
+STATUS_COUNTERS = {
+    "matched": ("matched_count", None),
+    "fulfilled": ("fulfilled_count", "fulfilled_quantity"),
+    "expired": ("expired_count", "expired_quantity"),
+}
+
+# Rough per-unit impact factors for the summary cards
+CO2_KG_PER_UNIT = 2.5
+WATER_LITERS_PER_UNIT = 50
+MEALS_PER_UNIT = 0.75
+
+
+def _today():
+    return datetime.utcnow().date()
+
+
+def _upsert_increments(db: Session, table, key_columns, rows, counters):
+    """INSERT rows, adding the counters onto rows that already exist"""
+    if not rows:
+        return
+    insert = dialect_insert(db)
+    # Sorted so concurrent writers lock rollup rows in the same order
+    rows = sorted(rows, key=lambda row: tuple(row[column] for column in key_columns))
+    for start in range(0, len(rows), 500):
+        stmt = insert(table).values(rows[start:start + 500])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={name: table.c[name] + stmt.excluded[name] for name in counters},
+        )
+        db.execute(stmt)
+
+
+def _add_daily(db: Session, increments):
+    rows = [
+        {"provider_id": provider_id, "day": day, "category": category,
+         **{name: counts.get(name, 0) for name in DAILY_COUNTERS}}
+        for (provider_id, day, category), counts in increments.items()
+    ]
+    _upsert_increments(
+        db, ProviderDailyRollup.__table__, ("provider_id", "day", "category"), rows, DAILY_COUNTERS
+    )
+
+
+def record_donations(db: Session, items):
+    """Count newly posted food items; call before the creating transaction commits"""
+    today = _today()
+    daily = defaultdict(Counter)
+    titles = Counter()
+    for item in items:
+        counts = daily[(item.provider_id, today, item.category or "")]
+        counts["donated_count"] += 1
+        counts["donated_quantity"] += item.quantity
+        titles[(item.provider_id, item.title)] += 1
+
+    _add_daily(db, daily)
+    _upsert_increments(
+        db, ProviderItemRollup.__table__, ("provider_id", "title"),
+        [{"provider_id": p, "title": t, "donated_count": n} for (p, t), n in titles.items()],
+        ("donated_count",),
+    )
+
+
+def record_status_changes(db: Session, items, status: str):
+    """Count items that just became matched, fulfilled or expired.
+
+    `items` need provider_id, category and quantity. Call before the
+    transaction that changes their status commits.
+    """
+    count_column, quantity_column = STATUS_COUNTERS[status]
+    today = _today()
+    daily = defaultdict(Counter)
+    for item in items:
+        counts = daily[(item.provider_id, today, item.category or "")]
+        counts[count_column] += 1
+        if quantity_column:
+            counts[quantity_column] += item.quantity
+    _add_daily(db, daily)
+
+
+def record_fulfilled_allocations(db: Session, handed_over, closed_items):
+    """Count allocated quantities handed over and the items that closed with them.
+
+    `handed_over` is (item, quantity) pairs, items need provider_id and
+    category. Call before the transaction that fulfils them commits.
+    """
+    today = _today()
+    daily = defaultdict(Counter)
+    for item, quantity in handed_over:
+        daily[(item.provider_id, today, item.category or "")]["fulfilled_quantity"] += quantity
+    for item in closed_items:
+        daily[(item.provider_id, today, item.category or "")]["fulfilled_count"] += 1
+    _add_daily(db, daily)
+
+
+def rebuild_rollups(db: Session):
+    """Recompute every rollup from food_items and allocations, for backfills and repairs.
+
+    Handed over quantities are summed from the fulfilled allocations and booked
+    on their hand-over day, as record_fulfilled_allocations does; an item
+    closed by its hand-overs counts as fulfilled on the day of its last one.
+    Items matched before allocations were recorded count whole once their
+    request is fulfilled, and other status changes carry no timestamp, so
+    those are booked on the day the item was posted. Items marked fulfilled
+    without being handed over were closed by the expiry sweep and count as
+    expired.
+    """
+    allocated = select(
+        Allocation.food_item_id,
+        func.sum(Allocation.quantity).label("quantity"),
+        (func.count() - func.count(Allocation.fulfilled_at)).label("pending"),
+        func.max(Allocation.fulfilled_at).label("last_fulfilled_at"),
+    ).group_by(Allocation.food_item_id).subquery()
+
+    has_request = exists().where(Request.matched_item_id == FoodItem.id)
+    request_fulfilled = exists().where(
+        Request.matched_item_id == FoodItem.id, Request.status == "fulfilled"
+    )
+    # Taken whole by the matcher or allocated up to its quantity, as _fulfil_allocations closes items;
+    # an item still available was neither, even when a request points at it
+    covered = and_(
+        FoodItem.status != "available", or_(has_request, allocated.c.quantity >= FoodItem.quantity)
+    )
+    handed_over = and_(FoodItem.status == "fulfilled", allocated.c.pending == 0, covered)
+    unallocated = and_(FoodItem.status == "fulfilled", allocated.c.food_item_id.is_(None), request_fulfilled)
+    # CASE rather than NOT, as the allocation columns are NULL for unallocated items
+    expired = case((handed_over, False), (unallocated, False), else_=FoodItem.status == "fulfilled")
+
+    def count_if(condition):
+        return case((condition, 1), else_=0)
+
+    def quantity_if(condition):
+        return case((condition, FoodItem.quantity), else_=0)
+
+    def day_of(column):
+        return func.date(column).label("day")
+
+    category = func.coalesce(FoodItem.category, "").label("category")
+    zero = literal(0)
+    posted = select(
+        FoodItem.provider_id, day_of(FoodItem.created_at), category,
+        literal(1), FoodItem.quantity, count_if(covered),
+        count_if(unallocated), quantity_if(unallocated),
+        count_if(expired), quantity_if(expired),
+    ).outerjoin(allocated, allocated.c.food_item_id == FoodItem.id)
+    closed = select(
+        FoodItem.provider_id, day_of(allocated.c.last_fulfilled_at), category,
+        zero, zero, zero, literal(1), zero, zero, zero,
+    ).join(allocated, allocated.c.food_item_id == FoodItem.id).where(handed_over)
+    fulfilled = select(
+        FoodItem.provider_id, day_of(Allocation.fulfilled_at), category,
+        zero, zero, zero, zero, Allocation.quantity, zero, zero,
+    ).join(Allocation, Allocation.food_item_id == FoodItem.id).where(Allocation.fulfilled_at.is_not(None))
+
+    rows = union_all(posted, closed, fulfilled).subquery()
+    keys = (rows.c.provider_id, rows.c.day, rows.c.category)
+    daily = select(
+        *keys, *(func.sum(column) for column in list(rows.c)[len(keys):])
+    ).group_by(*keys)
+
+    items = select(FoodItem.provider_id, FoodItem.title, func.count())\
+        .group_by(FoodItem.provider_id, FoodItem.title)
+
+    daily_table = ProviderDailyRollup.__table__
+    item_table = ProviderItemRollup.__table__
+    db.execute(delete(daily_table))
+    db.execute(delete(item_table))
+    db.execute(daily_table.insert().from_select(["provider_id", "day", "category", *DAILY_COUNTERS], daily))
+    db.execute(item_table.insert().from_select(["provider_id", "title", "donated_count"], items))
+    db.commit()
+
+
+def provider_impact(db: Session, provider_id: int, days: int = 30):
+    """Dashboard numbers for /analytics/provider-impact, read from the rollups only"""
+    daily = ProviderDailyRollup
+
+    totals = db.execute(
+        select(
+            func.coalesce(func.sum(daily.donated_count), 0),
+            func.coalesce(func.sum(daily.donated_quantity), 0),
+            func.coalesce(func.sum(daily.fulfilled_count), 0),
+        ).where(daily.provider_id == provider_id)
+    ).one()
+    total_donations, total_quantity, fulfilled = totals
+
+    categories = db.execute(
+        select(daily.category, func.sum(daily.donated_count))
+        .where(daily.provider_id == provider_id)
+        .group_by(daily.category)
+        .order_by(func.sum(daily.donated_count).desc())
+    ).all()
+
+    today = _today()
+    first_day = today - timedelta(days=days - 1)
+    per_day = dict(db.execute(
+        select(daily.day, func.sum(daily.donated_count))
+        .where(daily.provider_id == provider_id, daily.day >= first_day)
+        .group_by(daily.day)
+    ).all())
+
+    top_items = db.execute(
+        select(ProviderItemRollup.title, ProviderItemRollup.donated_count)
+        .where(ProviderItemRollup.provider_id == provider_id)
+        .order_by(ProviderItemRollup.donated_count.desc(), ProviderItemRollup.title)
+        .limit(3)
+    ).all()
+
+    return {
+        "summary": {
+            "total_donations": int(total_donations),
+            "total_quantity": int(total_quantity),
+            "fulfilled_donations": int(fulfilled),
+            "co2_saved_kg": round(total_quantity * CO2_KG_PER_UNIT, 2),
+            "water_saved_liters": round(total_quantity * WATER_LITERS_PER_UNIT, 2),
+            "meals_estimated": int(total_quantity * MEALS_PER_UNIT)
+        },
+        "category_breakdown": [
+            {"category": category or "Others", "count": int(count)} for category, count in categories
+        ],
+        "donation_trend": [
+            {"date": day.strftime("%Y-%m-%d"), "count": int(per_day.get(day, 0))}
+            for day in (first_day + timedelta(days=i) for i in range(days))
+        ],
+        "top_items": [{"title": title, "count": count} for title, count in top_items]
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        from config.database import SessionLocal
+        session = SessionLocal()
+        try:
+            rebuild_rollups(session)
+            print("Rollups rebuilt from food_items and allocations!")
+        finally:
+            session.close()
+    else:
+        print("Usage: python rollups.py rebuild")
@@ -1,18 +1,34 @@
 #ALl the endpoints will be defined here
 
+import shutil
+import tempfile
+import time
 from datetime import datetime, timedelta
-from typing import List
-import random
-from fastapi import APIRouter, HTTPException, Depends, status
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Body, Cookie, Depends, File, Header, Query, Response, UploadFile, status
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from config.logging_config import get_logger
-from config.database import get_db
-from models import UserCreate, Token, FoodItemCreate, FoodItemOut, RequestOut, RequestCreate, FeedbackOut, FeedbackCreate, ShelterRequestOut
-from schema import User
-from crud import create_user, get_user_by_email, create_new_food_item, get_active_inventory, create_request, match_requests_to_food_items, mark_expired_food_items_as_fulfilled, mark_food_as_fulfilled, submit_feedback, get_requests_for_receiver#, match_requests_to_food_items_ai
-from auth import authenticate_user, create_access_token, get_current_user, set_auth_cookie, get_password_hash
-from fastapi.responses import JSONResponse
+from config.database import get_db, SessionLocal
+from config.replicas import get_read_db, read_session_factory
+from config.settings import settings
+from scheduler import match_new_rows
+from models import UserCreate, Token, FoodCategory, FoodItemCreate, FoodItemOut, RequestOut, RequestCreate, FeedbackOut, FeedbackCreate, ShelterRequestOut, Principal, InventoryCondition, InventorySort
+from crud import create_user, get_user_by_email, create_new_food_item, create_food_items_bulk, validate_food_item_batch, get_nearby_available_food, get_active_inventory, INVENTORY_SORT_TYPES, create_request, match_requests_to_food_items, assign_requests_to_food_items, mark_expired_food_items_as_fulfilled, mark_food_as_fulfilled, fulfill_request_allocations, submit_feedback, get_requests_for_receiver, get_requests_page, iter_requests, iter_requests_for_receiver, iter_active_inventory, match_requests_to_food_items_ai
+from auth import authenticate_user, create_access_token, get_current_user, set_auth_cookie
+from passwords import hashing_pool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pagination import decode_cursor_param
+from streaming import ndjson_response
+from rollups import provider_impact, record_donations, record_status_changes
+from changes import provider_changed, receiver_changed, collection_version, PROVIDER_ITEMS, RECEIVER_REQUESTS, ALL_REQUESTS
+from notifications import notify_status, broker
+from etags import listing_etag, conditional_response
+from serializers import json_response, food_item_out, request_out
+from imports import create_import, run_import, import_progress, get_import_errors_page
+from schema import User, FoodItemImport
+from response_cache import cached_provider_response
 
 app_router = APIRouter()
 logger = get_logger(__name__)
@@ -25,7 +41,7 @@ logger = get_logger(__name__)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Login endpoint to get access token."""
     logger.info(f"Login attempt for email: {form_data.username}")
-    user_info = authenticate_user(db, form_data.username, form_data.password)
+    user_info = await authenticate_user(db, form_data.username, form_data.password)
     if not user_info:
         logger.warning(f"Failed login attempt for email: {form_data.username}")
         raise HTTPException(
@@ -44,33 +60,24 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     return response
 
 @app_router.post("/register", response_model=Token)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
     logger.info(f"Registration attempt for email: {user.email}")
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await run_in_threadpool(get_user_by_email, db, user.email)
     if db_user:
         logger.warning(f"Registration failed - email already exists: {user.email}")
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
-    create_user(db, user, hashed_password)
+    hashed_password = await hashing_pool.hash(user.password)
+    new_user = await run_in_threadpool(create_user, db, user, hashed_password)
     logger.info(f"User created successfully with email: {user.email}")
     
-    auth_info = authenticate_user(db, user.email, user.password)
-    if not auth_info:
-        logger.error(f"Failed to authenticate newly created user: {user.email}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    access_token = create_access_token(data={"sub": auth_info.email})
-    logger.info(f"Registration complete for user_id: {auth_info.id}, email: {auth_info.email}")
+    access_token = create_access_token(data={"sub": new_user.email})
+    logger.info(f"Registration complete for user_id: {new_user.id}, email: {new_user.email}")
     
     response = JSONResponse(content={
-        "user_id": auth_info.id,
-        "role": auth_info.role
+        "user_id": new_user.id,
+        "role": new_user.role
     })
     set_auth_cookie(response, access_token, user.role)
     
@@ -83,7 +90,7 @@ async def logout():
     return response
 
 @app_router.get("/auth/me")
-async def get_authenticated_user(current_user: User = Depends(get_current_user)):
+async def get_authenticated_user(current_user: Principal = Depends(get_current_user)):
     """Get current user information."""
     return {
         "user_id": current_user.id,
@@ -98,15 +105,18 @@ async def get_authenticated_user(current_user: User = Depends(get_current_user))
 @app_router.post("/add-food", response_model=FoodItemOut)
 def create_food_item(
     food_data: FoodItemCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     try:
         if current_user.role != "provider":
             raise HTTPException(status_code=403, detail="Only providers can post food items")
 
         food_item = create_new_food_item(db, food_data, current_user.id)
-        return food_item
+        if settings.MATCH_ON_CREATE:
+            background_tasks.add_task(match_new_rows, item_ids=[food_item.id])
+        return json_response(food_item_out.row(food_item))
     except HTTPException as http_exc:
         logger.error(f"HTTPException: {http_exc.detail}")
         raise http_exc
@@ -115,71 +125,144 @@ def create_food_item(
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
     
 
+@app_router.post("/add-food/bulk")
+def create_food_items_in_bulk(
+    background_tasks: BackgroundTasks,
+    payload: List[Any] = Body(..., description="FoodItemCreate objects"),
+    match: bool = Query(False, description="Run matching for the new items before responding"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Post many food items at once.
+
+    Every row is validated on its own: invalid rows are listed by index under
+    errors and the valid ones are inserted together with one multi-row INSERT
+    in a single transaction.
+    """
+    if current_user.role != "provider":
+        raise HTTPException(status_code=403, detail="Only providers can post food items")
+    if len(payload) > settings.BULK_FOOD_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BULK_FOOD_MAX_ITEMS} items per batch")
+
+    valid, errors = validate_food_item_batch(payload)
+    created = create_food_items_bulk(db, [item for _, item in valid], current_user.id)
+    result = {
+        "created": [{"index": index, **food_item_out.row(row)} for (index, _), row in zip(valid, created)],
+        "errors": errors
+    }
+    if match and created:
+        result["matches"] = match_requests_to_food_items(db, item_ids=[row.id for row in created])
+    elif created and settings.MATCH_ON_CREATE:
+        background_tasks.add_task(match_new_rows, item_ids=[row.id for row in created])
+    return json_response(result)
+
+
+@app_router.get("/food/nearby")
+def get_nearby_food(
+    latitude: Optional[float] = Query(None, ge=-90, le=90, description="Defaults to your own coordinates"),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=200),
+    category: Optional[FoodCategory] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Available food items within radius_km, nearest first, with their distance"""
+    if latitude is None or longitude is None:
+        user = db.get(User, current_user.id)
+        if user is None:
+            # A new account may not have reached the replica yet
+            with SessionLocal() as primary:
+                user = primary.get(User, current_user.id)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        if user.latitude is None or user.longitude is None:
+            raise HTTPException(status_code=400, detail="Your location has no coordinates, pass latitude and longitude")
+        latitude, longitude = user.latitude, user.longitude
+
+    nearby = get_nearby_available_food(
+        db, (latitude, longitude), radius_km, category.value if category else None, limit
+    )
+    return json_response({
+        "items": [{**food_item_out.row(item), "distance_km": round(distance, 3)} for item, distance in nearby]
+    })
+
 
 
 ############## REQUEST & MATCHING ENDPOINTS #######################
 @app_router.post("/requests", response_model=RequestOut)
 def submit_food_request(
     request_data: RequestCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role != "receiver":
         raise HTTPException(status_code=403, detail="Only receivers can submit requests")
 
-    return create_request(db, current_user.id, request_data)
+    new_request = create_request(db, current_user.id, request_data)
+    if settings.MATCH_ON_CREATE:
+        background_tasks.add_task(match_new_rows, request_ids=[new_request.id])
+    return json_response(request_out.row(new_request))
 
 
 @app_router.get("/all-requests")
 def get_all_open_requests(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    status_filter: Optional[List[str]] = Query(None, alias="status", description="Only return requests with these statuses"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get all open requests for providers to fulfill without matching."""
+    """Get requests from all receivers for providers to fulfill without matching.
+
+    Newest first, paged by keyset. The cursor for the next page is returned in
+    the X-Next-Cursor header and is absent on the last page. With format=ndjson
+    every row after the cursor is streamed instead, one JSON object per line.
+    JSON pages carry an ETag and If-None-Match is answered with 304.
+    """
     if current_user.role != "provider":
         raise HTTPException(status_code=403, detail="Only providers can view available requests")
-    
-    # Get all open requests from all receivers
-    from schema import Request
-    from sqlalchemy import or_
-    
-    # Get all open requests
-    open_requests = db.query(Request).all()
-    
-    result = []
-    for req in open_requests:
-        # Get the receiver's information
-        receiver = db.query(User).filter(User.id == req.receiver_id).first()
-        
-        result.append({
-            "id": req.id,
-            "title": req.title,
-            "created_at": req.created_at,
-            "urgency": req.urgency.capitalize(),
-            "status": req.status.capitalize(),
-            "notes": req.notes,
-            "requested_item": req.requested_item,
-            "category": req.category,
-            "quantity": req.quantity,
-            "matched_item_id": req.matched_item_id,
-            "receiver_name": receiver.name if receiver else "Unknown",
-            "items": [{
-                "name": req.requested_item,
-                "category": req.category,
-                "quantity": req.quantity,
-                "unit": "units"
-            }]
-        })
-    
-    return result
+
+    after = decode_cursor_param(cursor, datetime, int)
+    statuses = [s.lower() for s in status_filter] if status_filter else None
+    if response_format == "ndjson":
+        return ndjson_response(read_session_factory(db), iter_requests, statuses, after)
+
+    etag = listing_etag(collection_version(db, ALL_REQUESTS), "all-requests", statuses, cursor, limit)
+    not_modified = conditional_response(response, if_none_match, etag)
+    if not_modified:
+        return not_modified
+
+    result, next_cursor = get_requests_page(db, statuses, after, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return json_response(result, response)
 
 
 @app_router.post("/match")
-def run_matching(db: Session = Depends(get_db), user=Depends(get_current_user)):
+def run_matching(
+    mode: Literal["greedy", "assignment"] = Query(
+        "greedy", description="assignment splits item quantities across requests in one global solve"
+    ),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
     if user.role != "provider":
         return {"message": "Only providers can trigger matching."}
 
-    result = match_requests_to_food_items(db) or []  # fallback to empty list if None
+    if mode == "assignment":
+        result = assign_requests_to_food_items(db)
+        return {
+            "message": f"{len(result)} allocation(s) created.",
+            "allocations": result
+        }
+
+    result = match_requests_to_food_items(db)
 
     return {
         "message": f"{len(result)} match(es) created.",
@@ -242,13 +325,19 @@ def fulfill_request_directly(
     # Get provider information
     provider = user
     
-    # If the request is already matched to a food item, use that item
-    if request.status == "matched" and request.matched_item_id:
+    # Allocated quantities are handed over from their items, which close once fully handed over
+    allocated = fulfill_request_allocations(db, request)
+    food_item = None
+
+    # Matched before allocations were recorded: the item goes whole to the request
+    if not allocated and request.status == "matched" and request.matched_item_id:
         food_item = db.query(FoodItem).filter(FoodItem.id == request.matched_item_id).first()
         if food_item:
+            if food_item.status != "fulfilled":
+                record_status_changes(db, [food_item], "fulfilled")
             food_item.status = "fulfilled"
             db.add(food_item)
-    else:
+    elif request.quantity > allocated:
         # Create a placeholder fulfilled food item
         from datetime import datetime, timedelta
         
@@ -258,7 +347,7 @@ def fulfill_request_directly(
             title=f"Fulfilled: {request.requested_item}",
             description=f"Fulfilled request for {request.requested_item}",
             category=request.category,
-            quantity=request.quantity,
+            quantity=request.quantity - allocated,
             expiry=expiry,
             available_from=datetime.utcnow(),
             available_until=expiry,
@@ -268,13 +357,21 @@ def fulfill_request_directly(
         )
         db.add(food_item)
         db.flush()  # To get the ID
+        record_donations(db, [food_item])
+        record_status_changes(db, [food_item], "fulfilled")
         
         # Link the food item to the request
-        request.matched_item_id = food_item.id
+        if not request.matched_item_id:
+            request.matched_item_id = food_item.id
     
     # Update request status
     request.status = "fulfilled"
     db.add(request)
+    if food_item:
+        provider_changed(db, food_item.provider_id)
+        notify_status(db, food_item.provider_id, "food_item", food_item.id, "fulfilled")
+    receiver_changed(db, request.receiver_id)
+    notify_status(db, request.receiver_id, "request", request.id, "fulfilled", food_item_id=request.matched_item_id)
     db.commit()
     
     return {
@@ -286,14 +383,100 @@ def fulfill_request_directly(
 
 @app_router.get("/inventory/active")
 def load_active_inventory(
-    db: Session = Depends(get_db),
+    response: Response,
+    condition: Optional[List[InventoryCondition]] = Query(None, description="Only return items in these conditions"),
+    sort: InventorySort = Query("condition", description="condition sorts the most urgent items first"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size, every item when absent"),
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
+    """A provider's available and matched items with their condition labels.
+
+    Filtering, sorting and the condition labels are computed by the database.
+    With limit, pages are cut by keyset and the next page's cursor is returned
+    in the X-Next-Cursor header.
+    """
     if user.role != "provider":
         return {"message": "Only providers have an active inventory."}
 
-    inventory = get_active_inventory(db, user.id)
-    return {"inventory": inventory}
+    conditions = tuple(sorted(set(condition))) if condition else None
+    after = decode_cursor_param(cursor, INVENTORY_SORT_TYPES[sort], int)
+    if response_format == "ndjson":
+        return ndjson_response(read_session_factory(db), iter_active_inventory, user.id, conditions, sort, after)
+
+    # Condition labels age with the clock, so the tag also rolls over every minute
+    version = collection_version(db, PROVIDER_ITEMS, user.id)
+    etag = listing_etag(version, "inventory", user.id, conditions, sort, cursor, limit, int(time.time() // 60))
+    not_modified = conditional_response(response, if_none_match, etag)
+    if not_modified:
+        return not_modified
+
+    def build():
+        inventory, next_cursor = get_active_inventory(db, user.id, conditions, sort, after, limit)
+        return {"inventory": inventory}, next_cursor
+
+    body, next_cursor = cached_provider_response(
+        user.id, ("inventory", version, conditions, sort, after, limit), build
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(body, response)
+
+
+####################### CSV IMPORT ENDPOINTS #######################
+def _owned_import(db: Session, import_id: int, user: Principal) -> FoodItemImport:
+    food_import = db.get(FoodItemImport, import_id)
+    if not food_import or food_import.provider_id != user.id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return food_import
+
+
+@app_router.post("/imports/food-items", status_code=202)
+def import_food_items(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="CSV with a header row naming FoodItemCreate fields"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Queue a CSV inventory import and return its progress record right away.
+
+    The upload is copied to a temporary file block by block and imported in the
+    background one chunk at a time, so memory use does not grow with the file.
+    Poll GET /imports/{id} for progress and GET /imports/{id}/errors for rejected lines.
+    """
+    if current_user.role != "provider":
+        raise HTTPException(status_code=403, detail="Only providers can import food items")
+
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as spool:
+        shutil.copyfileobj(file.file, spool, 1024 * 1024)
+    food_import = create_import(db, current_user.id, file.filename)
+    background_tasks.add_task(run_import, SessionLocal, food_import.id, spool.name, settings.IMPORT_CHUNK_ROWS)
+    return json_response(import_progress(food_import), status_code=202)
+
+
+@app_router.get("/imports/{import_id}")
+def get_food_import(import_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    return json_response(import_progress(_owned_import(db, import_id, current_user)))
+
+
+@app_router.get("/imports/{import_id}/errors")
+def get_food_import_errors(
+    import_id: int,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Rejected CSV lines of an import with their validation errors, in line order"""
+    _owned_import(db, import_id, current_user)
+    rows, next_cursor = get_import_errors_page(db, import_id, decode_cursor_param(cursor, int), limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(rows, response)
 
 
 ####################### FEEDBACK ENDPOINTS #######################
@@ -301,7 +484,7 @@ def load_active_inventory(
 def leave_feedback(
     feedback_data: FeedbackCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role != "receiver":
         raise HTTPException(status_code=403, detail="Only receivers can leave feedback")
@@ -311,55 +494,70 @@ def leave_feedback(
 
 @app_router.get("/receiver/requests", response_model=List[ShelterRequestOut])
 def get_receiver_requests(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role != "receiver":
         raise HTTPException(status_code=403, detail="Only receivers can view their requests")
-    
-    return get_requests_for_receiver(db, current_user.id)
+
+    if response_format == "ndjson":
+        return ndjson_response(read_session_factory(db), iter_requests_for_receiver, current_user.id)
+
+    etag = listing_etag(
+        collection_version(db, RECEIVER_REQUESTS, current_user.id), "receiver-requests", current_user.id
+    )
+    not_modified = conditional_response(response, if_none_match, etag)
+    if not_modified:
+        return not_modified
+
+    return json_response(get_requests_for_receiver(db, current_user.id), response)
+
+###################### NOTIFICATION ENDPOINTS ##########################
+@app_router.get("/events")
+async def stream_events(access_token: Optional[str] = Cookie(None, alias="access_token")):
+    """Server-sent events for the status changes of the user's requests or food items.
+
+    Sends a `request` or `food_item` event ({"id", "status", ...}) per change
+    and a `resync` event when some may have been missed, after which the
+    client should refetch its listing. Replaces polling /receiver/requests and
+    /inventory/active.
+    """
+    # Authenticated with a session of its own, so the open stream holds no connection
+    db = SessionLocal()
+    try:
+        user = await get_current_user(access_token, db)
+    finally:
+        db.close()
+
+    return StreamingResponse(
+        broker.stream(user.id, user.expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 ######################### Analytics ENDPOINTS ###########################
 @app_router.get("/analytics/provider-impact")
-async def get_donation_analytics(current_user: User = Depends(get_current_user)):
+def get_donation_analytics(db: Session = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     if current_user.role != "provider":
         return JSONResponse(status_code=403, content={"error": "Only providers can view analytics"})
 
-    now = datetime.utcnow()
-    categories = ["Produce", "Dairy", "Meat", "Baked Goods", "Dry Goods"]
-
-    mock_data = {
-        "summary": {
-            "total_donations": 23,
-            "total_quantity": 138,
-            "co2_saved_kg": round(138 * 2.5, 2),  # ~2.5 kg CO₂ saved per item
-            "water_saved_liters": round(138 * 50, 2),  # ~50L per item
-            "meals_estimated": int(138 * 0.75)
-        },
-        "category_breakdown": [
-            {"category": cat, "count": random.randint(1, 10)} for cat in categories
-        ],
-        "donation_trend": [
-            {"date": (now - timedelta(days=i)).strftime("%Y-%m-%d"), "count": random.randint(0, 3)}
-            for i in reversed(range(30))
-        ],
-        "top_items": [
-            {"title": "Banana Box", "count": 6},
-            {"title": "Milk Carton", "count": 5},
-            {"title": "Bread Loaf", "count": 3}
-        ]
-    }
-
-    return mock_data
+    # Served from the rollup tables, never from a scan of food_items
+    version = collection_version(db, PROVIDER_ITEMS, current_user.id)
+    return json_response(cached_provider_response(
+        current_user.id, ("provider-impact", version), lambda: provider_impact(db, current_user.id)
+    ))
 
 ########################## AI Matching ENDPOINTS ###########################
-# @app_router.post("/match-ai")
-# def run_ai_matching(db: Session = Depends(get_db), user=Depends(get_current_user)):
-#     if user.role != "provider":
-#         return {"message": "Only providers can trigger matching."}
-
-#     result = match_requests_to_food_items_ai(db)
-#     return {
-#         "message": f"{len(result)} AI match(es) created.",
-#         "matches": result
-#     }
+@app_router.post("/match-ai")
+def run_ai_matching(db: Session = Depends(get_db), user=Depends(get_current_user)):
+    if user.role != "provider":
+        return {"message": "Only providers can trigger matching."}
+
+    result = match_requests_to_food_items_ai(db)
+    return {
+        "message": f"{len(result)} AI match(es) created.",
+        "matches": result
+    }
@@ -0,0 +1,153 @@
+# Background jobs: periodic ones are scheduled inside every worker process (those
+# marked leader_only run on one of them), the rest are queued by routes to run
+# after their response is sent
+import asyncio
+import zlib
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool
+from config.database import engine, SessionLocal
+from config.logging_config import get_logger
+from config.settings import settings
+from crud import mark_expired_food_items_as_fulfilled, match_requests_to_food_items
+
+logger = get_logger(__name__)
+
+
+class Leadership:
+    """Cluster-wide leadership of one periodic job, kept for the lifetime of the leader.
+
+    The leader holds a session-level Postgres advisory lock on a dedicated
+    connection (outside the pool) until it shuts down or loses the connection,
+    so exactly one worker runs the job and the others skip their ticks; once
+    the leader is gone, the next tick of another worker takes over. On other
+    databases there is a single process, which always leads.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._key = zlib.crc32(name.encode())
+        self._engine = None
+        self._conn = None
+
+    def acquire(self) -> bool:
+        """True when this process leads, taking the lock if it is free"""
+        if engine.dialect.name != "postgresql":
+            return True
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                self._conn.commit()
+                return True
+            except DBAPIError as exc:
+                # The lock went with the connection
+                logger.warning(f"Lost leadership of {self.name}: {exc}")
+                self._close()
+
+        if self._engine is None:
+            self._engine = create_engine(engine.url, poolclass=NullPool)
+        conn = self._engine.connect()
+        try:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self._key}).scalar()
+            conn.commit()
+        except DBAPIError:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        logger.info(f"This worker now leads {self.name}")
+        return True
+
+    def release(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self._key})
+            self._conn.commit()
+        except DBAPIError:
+            pass  # closing the connection releases it as well
+        finally:
+            self._close()
+
+    def _close(self):
+        try:
+            self._conn.close()
+        except DBAPIError:
+            pass
+        self._conn = None
+
+
+def sweep_expired_food_items():
+    """Expire overdue food items"""
+    db = SessionLocal()
+    try:
+        expired = mark_expired_food_items_as_fulfilled(db, chunk_size=settings.EXPIRY_SWEEP_CHUNK_SIZE)
+    finally:
+        db.close()
+    if expired:
+        logger.info(f"Expiry sweep marked {len(expired)} item(s) as fulfilled")
+
+
+def match_new_rows(item_ids=None, request_ids=None):
+    """Match just-created food items or requests against the current pool.
+
+    Queued as a background task (MATCH_ON_CREATE) by the routes that create
+    them, so matches appear within moments without a full /match run.
+    """
+    db = SessionLocal()
+    try:
+        matches = match_requests_to_food_items(db, item_ids=item_ids, request_ids=request_ids)
+    except Exception as exc:
+        logger.error(f"Incremental matching failed: {exc}")
+        return
+    finally:
+        db.close()
+    if matches:
+        logger.info(f"Incremental matching created {len(matches)} match(es)")
+
+
+class Scheduler:
+    """Runs blocking jobs every `interval` seconds on the threadpool.
+
+    A job added with leader_only runs on a single worker of the cluster, see Leadership.
+    """
+
+    def __init__(self):
+        self._jobs = []
+        self._tasks = []
+
+    def add_job(self, func, interval: float, leader_only: bool = False):
+        if interval > 0:
+            self._jobs.append((func, interval, Leadership(func.__name__) if leader_only else None))
+
+    @staticmethod
+    def _tick(func, leadership):
+        if leadership is None or leadership.acquire():
+            func()
+
+    async def _run(self, func, interval: float, leadership):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_in_threadpool(self._tick, func, leadership)
+            except Exception as exc:
+                logger.error(f"Scheduled job {func.__name__} failed: {exc}")
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run(*job)) for job in self._jobs]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for _, _, leadership in self._jobs:
+            if leadership is not None:
+                await run_in_threadpool(leadership.release)
+
+
+scheduler = Scheduler()
+scheduler.add_job(sweep_expired_food_items, settings.EXPIRY_SWEEP_INTERVAL_SECONDS, leader_only=True)
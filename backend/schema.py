@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, CheckConstraint, Boolean
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, LargeBinary, ForeignKey, Date, DateTime, JSON, CheckConstraint, Boolean, Index, DDL, event, text
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 from config.database import Base 
@@ -14,6 +14,8 @@ class User(Base):
     contact_info = Column(String(20))
     role = Column(String(20), nullable=False)  # 'provider' or 'receiver'
     location = Column(Text, nullable=False)
+    latitude = Column(Float)  # geocoded from location, see geocoding.py
+    longitude = Column(Float)
     type = Column(String(50), nullable=False)  # restaurant/store/person/NGO
     created_at = Column(DateTime, server_default=func.now())
 
@@ -38,12 +40,52 @@ class FoodItem(Base):
     available_from = Column(DateTime)
     available_until = Column(DateTime)
     pickup_location = Column(Text)
+    latitude = Column(Float)  # geocoded pickup_location, else the provider's coordinates
+    longitude = Column(Float)
     status = Column(String(20), default="available")  # available, matched, picked_up
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        # Matching and search only look at available items of one category, soonest expiry first
+        Index(
+            "ix_food_items_available_category_expiry", "category", "expiry",
+            postgresql_where=text("status = 'available'"),
+            sqlite_where=text("status = 'available'"),
+        ),
+        # Nearby food: status = 'available' AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?
+        Index(
+            "ix_food_items_available_location", "latitude", "longitude",
+            postgresql_where=text("status = 'available'"),
+            sqlite_where=text("status = 'available'"),
+        ),
+        # Provider inventory: provider_id = ? AND status IN (...)
+        Index("ix_food_items_provider_status_expiry", "provider_id", "status", "expiry"),
+        # Expiry sweep: status IN ('available', 'matched') AND expiry < now
+        Index(
+            "ix_food_items_active_expiry", "expiry",
+            postgresql_where=text("status IN ('available', 'matched')"),
+            sqlite_where=text("status IN ('available', 'matched')"),
+        ),
+        # Trigram GIN indexes serve the leading-wildcard ILIKE keyword search (see search.py)
+        Index(
+            "ix_food_items_title_trgm", "title",
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_food_items_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     provider = relationship("User", back_populates="food_items")
     matched_request = relationship("Request", back_populates="matched_item", uselist=False)
 
+event.listen(
+    FoodItem.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class Request(Base):
     __tablename__ = "requests"
@@ -62,6 +104,20 @@ class Request(Base):
     status = Column(String(20), default="open")  # open, matched, fulfilled, cancelled, completed
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        # Matching scans only the open requests
+        Index(
+            "ix_requests_open_category", "category", "created_at",
+            postgresql_where=text("status = 'open'"),
+            sqlite_where=text("status = 'open'"),
+        ),
+        Index("ix_requests_receiver_created", "receiver_id", "created_at"),
+        # Keyset pages of /all-requests, with and without a status filter
+        Index("ix_requests_created_id", "created_at", "id"),
+        Index("ix_requests_status_created_id", "status", "created_at", "id"),
+        Index("ix_requests_matched_item_id", "matched_item_id"),
+    )
+
     receiver = relationship("User", back_populates="food_requests")
     matched_item = relationship("FoodItem", back_populates="matched_request")
 
@@ -78,4 +134,97 @@ class Feedback(Base):
     rating = Column(Integer, nullable=False)  # 1 to 5
     comments = Column(Text)
     created_at = Column(DateTime, server_default=func.now())
-    request = relationship("Request", back_populates="feedback")
\ No newline at end of file
+    request = relationship("Request", back_populates="feedback")
+
+
+# Analytics rollups, maintained incrementally by rollups.py
+class ProviderDailyRollup(Base):
+    __tablename__ = "provider_daily_rollups"
+
+    provider_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    category = Column(String(50), primary_key=True)
+    donated_count = Column(Integer, nullable=False, default=0, server_default="0")
+    donated_quantity = Column(Integer, nullable=False, default=0, server_default="0")
+    matched_count = Column(Integer, nullable=False, default=0, server_default="0")
+    fulfilled_count = Column(Integer, nullable=False, default=0, server_default="0")
+    fulfilled_quantity = Column(Integer, nullable=False, default=0, server_default="0")
+    expired_count = Column(Integer, nullable=False, default=0, server_default="0")
+    expired_quantity = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class ProviderItemRollup(Base):
+    __tablename__ = "provider_item_rollups"
+
+    provider_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    title = Column(String(100), primary_key=True)
+    donated_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+# Change counters of the polled listings, bumped by changes.py in the writing transaction
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+
+    scope = Column(String(30), primary_key=True)
+    owner_id = Column(Integer, primary_key=True)  # provider or receiver id, 0 for global listings
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+# CSV inventory imports run by imports.py, with per-line errors kept for the provider
+class FoodItemImport(Base):
+    __tablename__ = "food_item_imports"
+
+    id = Column(Integer, primary_key=True)
+    provider_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String(255))
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, completed, failed
+    rows_processed = Column(Integer, nullable=False, default=0, server_default="0")
+    rows_imported = Column(Integer, nullable=False, default=0, server_default="0")
+    rows_failed = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime)
+
+
+class FoodItemImportError(Base):
+    __tablename__ = "food_item_import_errors"
+
+    import_id = Column(Integer, ForeignKey("food_item_imports.id", ondelete="CASCADE"), primary_key=True)
+    line = Column(Integer, primary_key=True)
+    errors = Column(JSON, nullable=False)
+    raw = Column(JSON)
+
+
+# Quantities of food items set aside for requests; an item can be split across
+# requests and a request served by several items
+class Allocation(Base):
+    __tablename__ = "allocations"
+
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, ForeignKey("requests.id"), nullable=False, index=True)
+    food_item_id = Column(Integer, ForeignKey("food_items.id"), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    fulfilled_at = Column(DateTime)  # set when the quantity was handed over
+
+
+# Coordinates of normalized location strings, loaded from an offline lookup table
+# by `python geocoding.py load` and extended with every location resolved from it
+class GeocodeCache(Base):
+    __tablename__ = "geocode_cache"
+
+    query = Column(Text, primary_key=True)  # geocoding.normalize_location() of the place
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    source = Column(String(20), nullable=False)  # lookup (from the table) or derived
+    created_at = Column(DateTime, server_default=func.now())
+
+
+# Text vectors of food items for semantic matching, written when the item is posted
+class FoodItemEmbedding(Base):
+    __tablename__ = "food_item_embeddings"
+
+    food_item_id = Column(Integer, ForeignKey("food_items.id"), primary_key=True)
+    model = Column(String(100), nullable=False)  # name of the vectorizer that produced it
+    vector = Column(LargeBinary, nullable=False)  # float32 array, native byte order
+    created_at = Column(DateTime, server_default=func.now())
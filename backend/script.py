@@ -3,8 +3,10 @@ from pathlib import Path
 
 # Add parent directory to Python path
 sys.path.append(str(Path(__file__).parent.parent))
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+import psycopg
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
 from config.settings import settings
 from config.database import Base, engine
 # Import all models to ensure they're registered with SQLAlchemy
@@ -14,14 +16,14 @@ def create_database():
     """Create database if it doesn't exist."""
     try:
         # Connect to PostgreSQL server (to postgres database)
-        conn = psycopg2.connect(
+        conn = psycopg.connect(
             dbname="postgres",
             user=settings.DB_USER,
             password=settings.DB_PASSWORD,
             host=settings.DB_HOST,
-            port=settings.DB_PORT
+            port=settings.DB_PORT,
+            autocommit=True
         )
-        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
         cursor = conn.cursor()
         
         # Check if database exists
@@ -40,10 +42,25 @@ def create_database():
         print(f"Error creating database: {e}")
         raise
 
+def alembic_config():
+    """Alembic config pointing at the migrations next to this script."""
+    return Config(str(Path(__file__).parent / "alembic.ini"))
+
+def upgrade_db():
+    """Apply all pending migrations."""
+    command.upgrade(alembic_config(), "head")
+    print("Database migrated to the latest revision!")
+
 def create_tables():
     """Create all tables in the database."""
     try:
+        if inspect(engine).has_table("users"):
+            # Existing database: bring it forward through the migrations
+            upgrade_db()
+            return
         Base.metadata.create_all(bind=engine)
+        # A fresh schema already matches the models, record it as fully migrated
+        command.stamp(alembic_config(), "head")
         print("Successfully created all tables!")
     except Exception as e:
         print(f"Error creating tables: {e}")
@@ -57,4 +74,7 @@ def init_db():
     print("Database initialization completed!")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "upgrade":
+        upgrade_db()
+    else:
+        init_db()
\ No newline at end of file
@@ -0,0 +1,42 @@
+# Keyword search over food item title and description
+from sqlalchemy import or_, func, literal
+from sqlalchemy.orm import Session
+from schema import FoodItem
+
+LIKE_ESCAPE = "\\"
+
+
+def escape_like(keyword: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally"""
+    return (
+        keyword.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", f"{LIKE_ESCAPE}%")
+        .replace("_", f"{LIKE_ESCAPE}_")
+    )
+
+
+def food_item_keyword_filter(keyword: str):
+    """Filter clause for food items whose title or description contains keyword.
+
+    On Postgres the ILIKE is answered from the pg_trgm GIN indexes declared on
+    schema.FoodItem. SQLite compiles the same clause to lower(...) LIKE lower(...),
+    which scans but behaves the same, so test databases need no extension.
+    """
+    pattern = f"%{escape_like(keyword)}%"
+    return or_(
+        FoodItem.title.ilike(pattern, escape=LIKE_ESCAPE),
+        FoodItem.description.ilike(pattern, escape=LIKE_ESCAPE),
+    )
+
+
+def food_item_relevance(db: Session, keyword: str):
+    """Ranking expression for keyword search, higher is better.
+
+    Uses pg_trgm similarity on Postgres and a constant on other databases.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return literal(0)
+    return func.greatest(
+        func.similarity(FoodItem.title, keyword),
+        func.similarity(func.coalesce(FoodItem.description, ""), keyword),
+    )
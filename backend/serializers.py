@@ -0,0 +1,83 @@
+# orjson responses and precompiled serializers for the hot endpoints
+from operator import attrgetter
+from typing import Optional
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from models import FoodItemOut, RequestOut, ShelterRequestOut
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson, which handles datetimes and enums natively"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=JSON_OPTIONS)
+
+
+class ModelSerializer:
+    """Turns trusted ORM objects into the JSON shape of a response model.
+
+    The attribute names and output keys (aliases included) are worked out once
+    from the model's fields, so each object costs one attrgetter call instead
+    of a from_attributes validation followed by a serialization pass.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        names = list(model.model_fields)
+        self.keys = tuple(
+            field.serialization_alias or field.alias or name
+            for name, field in model.model_fields.items()
+        )
+        self._get = attrgetter(*names)
+
+    def row(self, obj) -> dict:
+        return dict(zip(self.keys, self._get(obj)))
+
+    def rows(self, objs) -> list:
+        return [self.row(obj) for obj in objs]
+
+
+class ShelterRequestSerializer(ModelSerializer):
+    """ModelSerializer for ShelterRequestOut, built from a request row.
+
+    urgency and status are capitalized and items is the request's one item.
+    extra names further columns copied as they are, which the /all-requests
+    listing adds to ShelterRequestOut.
+    """
+
+    DERIVED = ("urgency", "status", "items")
+
+    def __init__(self, extra=()):
+        self.model = ShelterRequestOut
+        self.keys = (*(name for name in ShelterRequestOut.model_fields if name not in self.DERIVED), *extra)
+        self._get = attrgetter(*self.keys)
+
+    def row(self, req) -> dict:
+        row = dict(zip(self.keys, self._get(req)))
+        row["urgency"] = req.urgency.capitalize()
+        row["status"] = req.status.capitalize()
+        row["items"] = [{"name": req.requested_item, "category": req.category, "quantity": req.quantity, "unit": "units"}]
+        return row
+
+
+food_item_out = ModelSerializer(FoodItemOut)
+request_out = ModelSerializer(RequestOut)
+shelter_request_out = ShelterRequestSerializer()
+request_listing_out = ShelterRequestSerializer(
+    extra=("requested_item", "category", "quantity", "matched_item_id", "receiver_name")
+)
+
+
+def json_response(content, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """Serialize content with orjson as is, skipping response_model validation and jsonable_encoder.
+
+    Headers already set on the route's injected response (ETag, X-Next-Cursor)
+    are carried over.
+    """
+    result = FastJSONResponse(content, status_code=status_code)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
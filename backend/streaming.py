@@ -0,0 +1,34 @@
+# Streaming NDJSON responses for large exports
+import orjson
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+_LINE = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+
+
+def ndjson_response(session_factory, rows, *args, **kwargs) -> StreamingResponse:
+    """Stream rows(db, *args, **kwargs) as one JSON document per line.
+
+    The generator opens its own session because it keeps reading after the
+    request's dependencies have been torn down. Rows are serialized as they
+    come off the server-side cursor, so memory does not grow with the export.
+    """
+    def generate():
+        db = session_factory()
+        try:
+            for row in rows(db, *args, **kwargs):
+                yield orjson.dumps(row, option=_LINE)
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def async_ndjson_response(session_factory, rows, *args, **kwargs) -> StreamingResponse:
+    """ndjson_response for async row generators taking an AsyncSession"""
+    async def generate():
+        async with session_factory() as db:
+            async for row in rows(db, *args, **kwargs):
+                yield orjson.dumps(row, option=_LINE)
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,74 @@
+# Tests run against an in-memory SQLite database: settings only need to load,
+# no Postgres server is contacted. Run from the backend directory: python -m pytest
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+for name, value in {
+    "DB_USER": "test", "DB_PASSWORD": "test", "DB_HOST": "localhost",
+    "DB_PORT": "5432", "DB_NAME": "test", "SECRET_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+import config.database as database
+import schema  # noqa: F401 - registers the tables on Base
+import crud
+from models import UserCreate, FoodItemCreate, RequestCreate
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    database.Base.metadata.create_all(engine)
+    database.SessionLocal.configure(bind=engine)
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _user(db, email, role):
+    return crud.create_user(db, UserCreate(
+        name=email, location="", contact_info="555-0100", password="x", email=email, role=role, type="test"
+    ), "x")
+
+
+@pytest.fixture
+def provider(db):
+    return _user(db, "provider@example.com", "provider")
+
+
+@pytest.fixture
+def receiver(db):
+    return _user(db, "receiver@example.com", "receiver")
+
+
+@pytest.fixture
+def add_item(db, provider):
+    """Post an available food item; returns its id"""
+    def add(title, category="Dairy", quantity=10, description=None):
+        item = crud.create_new_food_item(db, FoodItemCreate(
+            title=title, description=description, category=category, quantity=quantity,
+            expiry=datetime.utcnow() + timedelta(days=2), pickup_location="",
+        ), provider.id)
+        return item.id
+    return add
+
+
+@pytest.fixture
+def add_request(db, receiver):
+    """Open a request; returns its id"""
+    def add(requested_item, category="Dairy", quantity=1, urgency="high"):
+        request = crud.create_request(db, receiver.id, RequestCreate(
+            title=f"Need {requested_item}", requested_item=requested_item, category=category,
+            quantity=quantity, urgency=urgency,
+        ))
+        return request.id
+    return add
@@ -0,0 +1,107 @@
+from sqlalchemy import select
+import crud
+from schema import Allocation, FoodItem, Request
+
+
+def statuses(db, model):
+    db.expire_all()
+    return dict(db.execute(select(model.id, model.status)).all())
+
+
+def matches(db):
+    db.expire_all()
+    return dict(db.execute(select(Request.id, Request.matched_item_id).where(Request.status == "matched")).all())
+
+
+def test_each_item_goes_to_one_request(db, add_item, add_request):
+    items = [add_item("Milk crate"), add_item("Milk bottles")]
+    requests = [add_request("milk"), add_request("milk"), add_request("milk")]
+
+    matched = crud.match_requests_to_food_items(db)
+
+    assert len(matched) == 2
+    pairs = matches(db)
+    assert sorted(pairs.values()) == items
+    assert statuses(db, FoodItem) == {item_id: "matched" for item_id in items}
+    [unmatched] = set(requests) - set(pairs)
+    assert statuses(db, Request)[unmatched] == "open"
+    assert db.scalar(select(Allocation.id).where(Allocation.request_id == unmatched)) is None
+
+
+def test_category_mismatch_is_not_matched(db, add_item, add_request):
+    cheese = add_item("Milk cheese", category="Dairy")
+    request_id = add_request("milk", category="Prepared Foods")
+
+    assert crud.match_requests_to_food_items(db) == []
+    assert statuses(db, Request) == {request_id: "open"}
+    assert statuses(db, FoodItem) == {cheese: "available"}
+
+
+def test_rerun_skips_requests_matched_by_an_earlier_round(db, add_item, add_request):
+    first_item = add_item("Milk crate")
+    first, second = add_request("milk"), add_request("milk")
+
+    [earlier] = crud.match_requests_to_food_items(db)
+    assert earlier["matched_food_id"] == first_item
+
+    second_item = add_item("Milk bottles")
+    [later] = crud.match_requests_to_food_items(db)
+
+    waiting = second if earlier["request_id"] == first else first
+    assert (later["request_id"], later["matched_food_id"]) == (waiting, second_item)
+    assert matches(db) == {earlier["request_id"]: first_item, waiting: second_item}
+    # The earlier match was left alone rather than allocated again
+    assert db.scalar(select(Allocation.id).where(Allocation.request_id == earlier["request_id"]).offset(1)) is None
+    assert crud.match_requests_to_food_items(db) == []
+
+
+def run_scoped(db, add_item, add_request, scope):
+    milk, cheese = add_item("Milk crate"), add_item("Cheese wheel")
+    milk_request, cheese_request = add_request("milk"), add_request("cheese")
+    ids = {"milk": milk, "cheese": cheese, "milk_request": milk_request, "cheese_request": cheese_request}
+    kwargs = {name: [ids[key] for key in keys] for name, keys in scope.items()}
+    crud.match_requests_to_food_items(db, **kwargs)
+    return ids, matches(db)
+
+
+def test_unscoped_run_matches_every_open_request(db, add_item, add_request):
+    ids, pairs = run_scoped(db, add_item, add_request, {})
+    assert pairs == {ids["milk_request"]: ids["milk"], ids["cheese_request"]: ids["cheese"]}
+
+
+def test_item_ids_only_offer_those_items(db, add_item, add_request):
+    ids, pairs = run_scoped(db, add_item, add_request, {"item_ids": ["milk"]})
+    assert pairs == {ids["milk_request"]: ids["milk"]}
+    assert statuses(db, FoodItem)[ids["cheese"]] == "available"
+
+
+def test_request_ids_only_match_those_requests(db, add_item, add_request):
+    ids, pairs = run_scoped(db, add_item, add_request, {"request_ids": ["cheese_request"]})
+    assert pairs == {ids["cheese_request"]: ids["cheese"]}
+    assert statuses(db, Request)[ids["milk_request"]] == "open"
+
+
+def test_item_ids_and_request_ids_together(db, add_item, add_request):
+    ids, pairs = run_scoped(db, add_item, add_request, {"item_ids": ["milk"], "request_ids": ["cheese_request"]})
+    assert pairs == {}
+
+
+def test_item_ids_skip_requests_already_matched(db, add_item, add_request):
+    first = add_item("Milk crate")
+    request_id = add_request("milk")
+    crud.match_requests_to_food_items(db, item_ids=[first])
+
+    second = add_item("Milk bottles")
+    assert crud.match_requests_to_food_items(db, item_ids=[second]) == []
+    assert matches(db) == {request_id: first}
+    assert statuses(db, FoodItem)[second] == "available"
+
+
+def test_item_ids_load_requests_by_literal_keyword(db, add_item, add_request):
+    item = add_item("Oat milk 1-2L")
+    requests = {keyword: add_request(keyword) for keyword in ("milk", "1_2l", "%", "oat milk 1-2l")}
+
+    served = db.scalars(
+        select(Request.id).where(crud._serves_any_of([item])).order_by(Request.id)
+    ).all()
+    assert served == [requests["milk"], requests["oat milk 1-2l"]]
@@ -0,0 +1,47 @@
+from sqlalchemy import select
+import crud
+import rollups
+from schema import ProviderDailyRollup, ProviderItemRollup, Request
+
+
+def rollup_rows(db):
+    daily = db.execute(select(ProviderDailyRollup.__table__).order_by(
+        ProviderDailyRollup.provider_id, ProviderDailyRollup.day, ProviderDailyRollup.category
+    )).all()
+    items = db.execute(select(ProviderItemRollup.__table__).order_by(
+        ProviderItemRollup.provider_id, ProviderItemRollup.title
+    )).all()
+    return daily, items
+
+
+def assert_rebuild_matches(db):
+    incremental = rollup_rows(db)
+    rollups.rebuild_rollups(db)
+    assert rollup_rows(db) == incremental
+    return incremental
+
+
+def dairy_fulfilled(daily_rows):
+    [dairy] = [row for row in daily_rows if row.category == "Dairy"]
+    return dairy.fulfilled_count, dairy.fulfilled_quantity
+
+
+def test_rebuild_matches_incremental_rollups_after_split_fulfilment(db, add_item, add_request):
+    milk = add_item("Milk crate", quantity=10)
+    first, second = add_request("milk", quantity=4), add_request("milk", quantity=3)
+    add_item("Cheese", quantity=5)
+    crud.assign_requests_to_food_items(db)
+
+    # Both allocations handed over one request at a time; 3 units stay available
+    for request_id in (first, second):
+        crud.fulfill_request_allocations(db, db.get(Request, request_id))
+        db.commit()
+    daily, _ = assert_rebuild_matches(db)
+    assert dairy_fulfilled(daily) == (0, 7)
+
+    # The rest goes whole to a later request, which closes the item
+    add_request("milk", quantity=3)
+    crud.match_requests_to_food_items(db)
+    crud.mark_food_as_fulfilled(milk, db)
+    daily, _ = assert_rebuild_matches(db)
+    assert dairy_fulfilled(daily) == (1, 10)